@@ -1,11 +1,59 @@
-from fastapi import FastAPI, HTTPException, Depends, Header
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, Header, Query, Body, Request
 from fastapi.middleware.cors import CORSMiddleware
-from firebase_admin import initialize_app, credentials, firestore, auth, _apps
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from typing import List, Optional
+from urllib.parse import urlsplit
+from app.config import Config
 from app.recommender import TopicBasedRecommender
 from app.feed_manager import FeedManager
+from app.ingestion import FeedIngestionService
+from app.shared_cache import SharedArticleCache, SharedCacheCoordinator
+from app.df_index import DocumentFrequencyIndex, snapshot_periodically
+from app.auth_cache import FirebaseAuthLayer, UserNotFoundError
+from app.metrics import registry, timed, TimingMiddleware
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global shared_cache
+    get_auth_layer()
+    if Config.WARMUP_ON_STARTUP:
+        await asyncio.to_thread(recommender.warm_up)
+    recommender.df_index = await asyncio.to_thread(
+        DocumentFrequencyIndex.load, Config.DF_INDEX_PATH, terms=recommender.scoring_engine.keywords,
+    )
+    snapshot_task = asyncio.create_task(snapshot_periodically(
+        recommender.df_index, Config.DF_INDEX_PATH, Config.DF_INDEX_SNAPSHOT_INTERVAL, writes_df_snapshot,
+    ))
+    if Config.FEED_INGESTION_ENABLED:
+        recommender.managed_feeds = frozenset(ingestion_service.feed_urls)
+    if Config.SHARED_CACHE_PATH:
+        # Only the worker holding the writer lease crawls, the rest read what it publishes
+        shared_cache = SharedCacheCoordinator(
+            await asyncio.to_thread(SharedArticleCache, Config.SHARED_CACHE_PATH, Config.SHARED_CACHE_LEASE_TTL),
+            recommender.article_store,
+            ingestion_service if Config.FEED_INGESTION_ENABLED else None,
+            on_entries=recommender.index_articles,
+            poll_interval=Config.SHARED_CACHE_POLL_INTERVAL,
+        )
+        await shared_cache.start()
+    elif Config.FEED_INGESTION_ENABLED:
+        ingestion_service.start()
+    yield
+    snapshot_on_exit = writes_df_snapshot() # decided before the writer lease is released
+    await ingestion_service.stop()
+    if shared_cache:
+        await shared_cache.stop()
+        shared_cache.cache.close()
+        shared_cache = None
+    snapshot_task.cancel()
+    if snapshot_on_exit:
+        recommender.df_index.snapshot(Config.DF_INDEX_PATH)
+    await recommender.close()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -13,65 +61,233 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
-
-if not _apps:
-    cred = credentials.Certificate("service_acc.json")
-    initialize_app(cred)
-
-db = firestore.client()
+app.add_middleware(TimingMiddleware, always_breakdown=Config.TIMING_BREAKDOWN_ALWAYS)
 
 recommender = TopicBasedRecommender()
 feed_manager = FeedManager()
+recommender.feed_parser.metric_hosts = frozenset(urlsplit(url).hostname for url in feed_manager.get_all_feeds())
+shared_cache = None # SharedCacheCoordinator, set up at startup when SHARED_CACHE_PATH is set
+
+def writes_df_snapshot():
+    # With a shared cache only the lease holder writes the snapshot every worker loads
+    return shared_cache is None or shared_cache.is_writer
+
+async def on_ingested(url, entries):
+    recommender.index_articles(url, entries)
+    if shared_cache:
+        await shared_cache.publish(url, entries)
+
+ingestion_service = FeedIngestionService(
+    recommender.feed_parser,
+    feed_manager.get_all_feeds(),
+    default_interval=Config.FEED_REFRESH_INTERVAL,
+    interval_overrides=Config.FEED_REFRESH_OVERRIDES,
+    jitter=Config.FEED_REFRESH_JITTER,
+    startup_spread=Config.FEED_STARTUP_SPREAD,
+    on_entries=on_ingested,
+)
+
+auth_layer = None # set before startup to inject a different Firebase client
+
+def get_auth_layer() -> FirebaseAuthLayer:
+    global auth_layer
+    if auth_layer is None:
+        from firebase_admin import initialize_app, credentials, firestore, auth, _apps
+        if not _apps:
+            cred = credentials.Certificate(Config.FIREBASE_CREDENTIALS)
+            initialize_app(cred)
+        auth_layer = FirebaseAuthLayer(
+            auth,
+            firestore.client(),
+            token_cache_size=Config.AUTH_TOKEN_CACHE_SIZE,
+            profile_cache_size=Config.PROFILE_CACHE_SIZE,
+            profile_ttl=Config.PROFILE_CACHE_TTL,
+        )
+    return auth_layer
 
 async def get_current_user(authorization: str = Header(None)):
     if not authorization:
         raise HTTPException(status_code=401, detail="Authorization header missing")
     try:
         token = authorization.replace('Bearer ', '')
-        decoded_token = auth.verify_id_token(token)
-        uid = decoded_token['uid']
-
-        # Fetch user interests from Firestore
-        user_ref = db.collection('users').document(uid)
-        user_data = user_ref.get()
-
-        if not user_data.exists:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        interests = user_data.to_dict().get("interests", [])
-
-        return {"uid": uid, "interests": interests}
+        with timed('auth'):
+            return await get_auth_layer().get_current_user(token)
+    except UserNotFoundError:
+        raise HTTPException(status_code=404, detail="User not found")
     except Exception as e:
         raise HTTPException(status_code=401, detail=f"Invalid authentication: {str(e)}")
+
+def article_json(article, request: Request) -> dict:
+    # Thumbnails are stored as site-relative paths unless PUBLIC_BASE_URL is set, and the
+    # frontend runs on another origin, so they are made absolute against this server
+    article = dict(article)
+    thumbnail = article.get('thumbnail')
+    if thumbnail and thumbnail.startswith('/'):
+        article['thumbnail'] = str(request.base_url).rstrip('/') + thumbnail
+    return article
+
+async def verify_admin_key(x_admin_key: str = Header(None)):
+    if not Config.ADMIN_API_KEY or x_admin_key != Config.ADMIN_API_KEY:
+        raise HTTPException(status_code=403, detail="Admin key missing or invalid")
     
 
 @app.get("/api/recommendations")
 async def get_recommendations(
+    request: Request,
     user_profile: str = "General interest reader",
     feed_urls: Optional[List[str]] = None,
+    n_recommendations: int = Query(5, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    deadline_ms: Optional[int] = Query(None, ge=1),
     current_user: dict = Depends(get_current_user)
 ):
     if not feed_urls:
         feed_urls = feed_manager.get_feeds_for_interests(current_user['interests'])
+    deadline_ms = deadline_ms or Config.RECOMMENDATION_DEADLINE_MS
 
     try:
-        recommendations = await recommender.get_recommendations(
+        recommendations, complete = await recommender.get_recommendations_within(
             user_profile,
             feed_urls,
-            current_user['interests']
+            current_user['interests'],
+            n_recommendations=n_recommendations,
+            offset=offset,
+            deadline=deadline_ms / 1000 if deadline_ms else None,
         )
-        return {
-            "recommendations": recommendations,
-            "user_id": current_user['uid'],
-            "interests": current_user['interests'],
-        }
+        with timed('serialization'):
+            return JSONResponse({
+                "recommendations": [article_json(article, request) for article in recommendations],
+                "user_id": current_user['uid'],
+                "interests": current_user['interests'],
+                "complete": complete,
+            })
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    await recommender.close()
+@app.get("/api/recommendations/stream")
+async def stream_recommendations(
+    request: Request,
+    feed_urls: Optional[List[str]] = None,
+    n_recommendations: int = Query(5, ge=1, le=100),
+    deadline_ms: Optional[int] = Query(None, ge=1),
+    current_user: dict = Depends(get_current_user)
+):
+    """NDJSON stream: one line with the current top-k every time another feed arrives."""
+    if not feed_urls:
+        feed_urls = feed_manager.get_feeds_for_interests(current_user['interests'])
+    deadline_ms = deadline_ms or Config.RECOMMENDATION_DEADLINE_MS
+
+    async def lines():
+        feeds_done = 0
+        updates = recommender.stream_recommendations(
+            feed_urls,
+            current_user['interests'],
+            n_recommendations=n_recommendations,
+            deadline=deadline_ms / 1000 if deadline_ms else None,
+        )
+        async for recommendations, feeds_done in updates:
+            yield json.dumps({
+                "recommendations": [article_json(article, request) for article in recommendations],
+                "feeds_done": feeds_done,
+                "feeds_total": len(feed_urls),
+                "complete": feeds_done == len(feed_urls),
+            }) + "\n"
+        if feeds_done < len(feed_urls):
+            yield json.dumps({"feeds_done": feeds_done, "feeds_total": len(feed_urls), "complete": False, "deadline_expired": True}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.post("/api/admin/recommendations/batch", dependencies=[Depends(verify_admin_key)])
+async def batch_recommendations(
+    request: Request,
+    user_ids: List[str] = Body(..., embed=True),
+    n_recommendations: int = Query(5, ge=1, le=100),
+):
+    """Rankings for many users at once (digests, notifications), each over that user's own feeds."""
+    user_ids = list(dict.fromkeys(user_ids))
+    if len(user_ids) > Config.BATCH_MAX_USERS:
+        raise HTTPException(status_code=413, detail=f"At most {Config.BATCH_MAX_USERS} users per batch")
+
+    profiles = await asyncio.gather(*(get_auth_layer().get_interests(uid) for uid in user_ids), return_exceptions=True)
+    feeds_per_interests = {} # users with the same interests read the same feeds
+    users = {}
+    for uid, interests in zip(user_ids, profiles):
+        if isinstance(interests, BaseException):
+            continue
+        key = tuple(interests)
+        if key not in feeds_per_interests:
+            feeds_per_interests[key] = feed_manager.get_feeds_for_interests(interests)
+        users[uid] = (interests, feeds_per_interests[key])
+
+    try:
+        rankings = await recommender.get_batch_recommendations(users, n_recommendations)
+        with timed('serialization'):
+            return JSONResponse({
+                "recommendations": {uid: [article_json(article, request) for article in articles] for uid, articles in rankings.items()},
+                "skipped_users": [uid for uid in user_ids if uid not in users], # unknown users or failed profile reads
+            })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/profile/invalidate")
+async def invalidate_profile(current_user: dict = Depends(get_current_user)):
+    # Call after changing interests so the next request reads them from Firestore
+    get_auth_layer().invalidate_user(current_user['uid'])
+    return {"status": "ok"}
+
+@app.get("/api/thumbnails/{thumb_id}")
+async def get_thumbnail(thumb_id: str):
+    path = recommender.feed_parser.thumbnails.path_for(thumb_id)
+    if path is None or not path.exists():
+        raise HTTPException(status_code=404, detail="Thumbnail not found")
+    return FileResponse(
+        path,
+        media_type="image/jpeg",
+        headers={"Cache-Control": f"public, max-age={Config.THUMBNAIL_MAX_AGE}"},
+    )
+
+@app.post("/api/admin/feeds/refresh", dependencies=[Depends(verify_admin_key)])
+async def refresh_feeds(feed_urls: Optional[List[str]] = None):
+    refreshed = await ingestion_service.refresh(feed_urls)
+    return {"refreshed": refreshed}
+
+@app.get("/api/admin/feeds/health", dependencies=[Depends(verify_admin_key)])
+async def feed_health():
+    return recommender.feed_parser.health.report()
+
+@app.get("/api/admin/cache/stats", dependencies=[Depends(verify_admin_key)])
+async def cache_stats():
+    return {
+        "recommendations": recommender.result_cache.get_stats(),
+        "articles": recommender.article_store.stats(),
+    }
+
+registry.callback(
+    'recommender_result_cache_events_total', 'Recommendation result cache lookups by outcome.', 'counter',
+    lambda: {(('outcome', name),): value for name, value in recommender.result_cache.stats.items()},
+)
+registry.callback(
+    'recommender_result_cache_entries', 'Rankings held in the recommendation result cache.', 'gauge',
+    lambda: {(): recommender.result_cache.get_stats()['size']},
+)
+registry.callback(
+    'recommender_article_store_bytes', 'Estimated memory held by parsed articles.', 'gauge',
+    lambda: {(): recommender.article_store.size},
+)
+registry.callback(
+    'recommender_article_store_articles', 'Parsed articles held in the article store.', 'gauge',
+    lambda: {(): recommender.article_store.stats()['articles']},
+)
+registry.callback(
+    'recommender_feed_circuits_open', 'Feeds currently skipped by the circuit breaker.', 'gauge',
+    lambda: {(): recommender.feed_parser.health.report()['open_circuits']},
+)
+
+@app.get("/metrics")
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/")
 async def root():
@@ -0,0 +1,184 @@
+import sys
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+class Article(Mapping):
+    """
+    Compact, read-only article record. Behaves like the article dicts the parser
+    produces, so existing `article['title']` / `article.get(...)` callers keep working.
+    Authors and category strings are interned, so repeated values are stored once.
+    """
+
+    __slots__ = ('title', 'description', 'link', 'published', 'thumbnail', 'author', 'categories')
+    FIELDS = __slots__
+
+    def __init__(self, title: str, description: str, link: str, published: Optional[str],
+                 thumbnail: Optional[str], author: str, categories: tuple):
+        self.title = title
+        self.description = description
+        self.link = link
+        self.published = published
+        self.thumbnail = thumbnail  # URL of the cached thumbnail, never the image itself
+        self.author = author
+        self.categories = categories  # ((term, scheme, label), ...)
+
+    @classmethod
+    def from_dict(cls, entry: Dict) -> 'Article':
+        return cls(
+            entry.get('title', ''),
+            entry.get('description', ''),
+            entry.get('link', ''),
+            entry.get('published'),
+            entry.get('thumbnail'),
+            _intern(entry.get('author', '')),
+            tuple(
+                (_intern(tag.get('term')), _intern(tag.get('scheme')), _intern(tag.get('label')))
+                for tag in entry.get('categories', [])
+            ),
+        )
+
+    def __getitem__(self, key: str):
+        if key == 'categories':
+            return [{'term': term, 'scheme': scheme, 'label': label} for term, scheme, label in self.categories]
+        if key in self.FIELDS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.FIELDS)
+
+    def __len__(self) -> int:
+        return len(self.FIELDS)
+
+    def to_dict(self) -> Dict:
+        return {key: self[key] for key in self.FIELDS}
+
+    def estimated_size(self) -> int:
+        # Interned author/category strings are shared, so only their references count
+        size = sys.getsizeof(self) + sys.getsizeof(self.categories)
+        for value in (self.title, self.description, self.link, self.published, self.thumbnail):
+            if value is not None:
+                size += sys.getsizeof(value)
+        return size
+
+class _FeedRecord:
+    __slots__ = ('articles', 'fetched_at', 'fresh_until', 'size', 'postings')
+
+    def __init__(self, articles: List[Article], fetched_at: float, fresh_until: float, size: int):
+        self.articles = articles
+        self.fetched_at = fetched_at
+        self.fresh_until = fresh_until
+        self.size = size
+        self.postings = None  # keyword index built from these articles, dropped with them
+
+class ArticleStore:
+    """
+    Parsed articles per feed URL, bounded by an estimated memory budget.
+
+    Entries stay fresh for `fresh_ttl` seconds, after which callers should refetch
+    but may keep serving them. Feeds older than `retention` seconds are dropped,
+    and the least recently used feeds are evicted whenever the budget is exceeded.
+    Keyword postings built from a feed's articles are stored, counted and evicted
+    with them.
+    """
+
+    def __init__(self, max_bytes: int, fresh_ttl: float, retention: float):
+        self.max_bytes = max_bytes
+        self.fresh_ttl = fresh_ttl
+        self.retention = retention
+        self._feeds = OrderedDict()  # url -> _FeedRecord, least recently used first
+        self.size = 0
+        self.evictions = 0
+
+    def put(self, url: str, entries: List[Dict], fetched_at: Optional[float] = None) -> List[Article]:
+        articles = [entry if isinstance(entry, Article) else Article.from_dict(entry) for entry in entries]
+        now = time.time()
+        fetched_at = fetched_at or now  # earlier when copied from another worker's fetch
+        record = _FeedRecord(
+            articles, fetched_at, fetched_at + self.fresh_ttl,
+            sys.getsizeof(articles) + sum(article.estimated_size() for article in articles),
+        )
+        self._drop(url)
+        self._feeds[url] = record
+        self.size += record.size
+        self._evict(now)
+        return articles
+
+    def get(self, url: str) -> Optional[List[Article]]:
+        """Stored articles, fresh or not."""
+        record = self._feeds.get(url)
+        if record is None:
+            return None
+        if time.time() - record.fetched_at > self.retention:
+            self._drop(url)
+            self.evictions += 1
+            return None
+        self._feeds.move_to_end(url)
+        return record.articles
+
+    def is_fresh(self, url: str) -> bool:
+        record = self._feeds.get(url)
+        return record is not None and time.time() < record.fresh_until
+
+    def touch(self, url: str):
+        """Mark a feed fresh again without replacing its articles, e.g. after a 304."""
+        record = self._feeds.get(url)
+        if record is not None:
+            record.fetched_at = time.time()
+            record.fresh_until = record.fetched_at + self.fresh_ttl
+            self._feeds.move_to_end(url)
+
+    def postings(self, url: str, articles: List[Article]) -> Optional[Any]:
+        """What set_postings attached to `articles`, while they are still the stored ones."""
+        record = self._feeds.get(url)
+        if record is None or record.articles is not articles:
+            return None
+        return record.postings
+
+    def set_postings(self, url: str, articles: List[Article], postings: Any, size: int):
+        """Keep `postings` with the stored `articles`, counted against the budget and evicted with them."""
+        record = self._feeds.get(url)
+        if record is None or record.articles is not articles or record.postings is not None:
+            return
+        record.postings = postings
+        record.size += size
+        self.size += size
+        self._evict(time.time())
+
+    def _drop(self, url: str):
+        record = self._feeds.pop(url, None)
+        if record is not None:
+            self.size -= record.size
+
+    def _evict(self, now: float):
+        for url in [url for url, record in self._feeds.items() if now - record.fetched_at > self.retention]:
+            self._drop(url)
+            self.evictions += 1
+        while self.size > self.max_bytes and len(self._feeds) > 1:
+            url = next(iter(self._feeds))
+            self._drop(url)
+            self.evictions += 1
+
+    def clear(self):
+        self._feeds.clear()
+        self.size = 0
+
+    def stats(self) -> Dict:
+        return {
+            'feeds': len(self._feeds),
+            'articles': sum(len(record.articles) for record in self._feeds.values()),
+            'bytes': self.size,
+            'max_bytes': self.max_bytes,
+            'evictions': self.evictions,
+        }
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._feeds
+
+    def __len__(self) -> int:
+        return len(self._feeds)
@@ -0,0 +1,52 @@
+import asyncio
+import hashlib
+import time
+from typing import Dict, List
+from .utils.cache import TTLCache
+
+class UserNotFoundError(Exception):
+    pass
+
+class FirebaseAuthLayer:
+    """
+    Caches decoded ID tokens until their `exp` claim and user interests in a TTL/LRU cache.
+
+    `auth_client` needs `verify_id_token(token)` and `db` needs
+    `collection(name).document(id).get()`, so firebase_admin's `auth` module and
+    Firestore client can be swapped for local fakes. Their blocking calls run in a thread.
+    """
+
+    def __init__(self, auth_client, db, token_cache_size: int = 10000, profile_cache_size: int = 10000, profile_ttl: float = 300):
+        self.auth_client = auth_client
+        self.db = db
+        self.token_cache = TTLCache(token_cache_size, ttl=0)  # ttl comes from each token's exp
+        self.profile_cache = TTLCache(profile_cache_size, ttl=profile_ttl)
+
+    async def verify_token(self, token: str) -> Dict:
+        key = hashlib.sha256(token.encode('utf-8')).hexdigest()  # never keep raw tokens around
+        decoded_token = self.token_cache.get(key)
+        if decoded_token is None:
+            decoded_token = await asyncio.to_thread(self.auth_client.verify_id_token, token)
+            self.token_cache.set(key, decoded_token, ttl=decoded_token.get('exp', 0) - time.time())
+        return decoded_token
+
+    def _fetch_interests(self, uid: str) -> List[str]:
+        user_data = self.db.collection('users').document(uid).get()
+        if not user_data.exists:
+            raise UserNotFoundError(uid)
+        return user_data.to_dict().get("interests", [])
+
+    async def get_interests(self, uid: str) -> List[str]:
+        interests = self.profile_cache.get(uid)
+        if interests is None:
+            interests = await asyncio.to_thread(self._fetch_interests, uid)
+            self.profile_cache.set(uid, interests)
+        return interests
+
+    def invalidate_user(self, uid: str):
+        self.profile_cache.invalidate(uid)
+
+    async def get_current_user(self, token: str) -> Dict:
+        decoded_token = await self.verify_token(token)
+        uid = decoded_token['uid']
+        return {"uid": uid, "interests": await self.get_interests(uid)}
@@ -1,4 +1,5 @@
 import os
+import json
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -20,4 +21,86 @@ class Config:
         { id: 13, 'name': 'Gaming', 'icon': '🎮' },
         { id: 14, 'name': 'Fashion', 'icon': '👗' },
         { id: 15, 'name': 'Environment', 'icon': '🌍' }
-    ]
\ No newline at end of file
+    ]
+
+    # Background feed ingestion
+    FEED_INGESTION_ENABLED = os.getenv('FEED_INGESTION_ENABLED', 'true').lower() == 'true'
+    FEED_REFRESH_INTERVAL = int(os.getenv('FEED_REFRESH_INTERVAL', 2 * 60 * 60))  # seconds
+    FEED_REFRESH_OVERRIDES = json.loads(os.getenv('FEED_REFRESH_OVERRIDES', '{}'))  # {feed_url: seconds}
+    FEED_REFRESH_JITTER = float(os.getenv('FEED_REFRESH_JITTER', 0.1))  # fraction of the interval
+    FEED_STARTUP_SPREAD = float(os.getenv('FEED_STARTUP_SPREAD', 30))  # seconds to stagger the first crawl over
+
+    # Outbound HTTP
+    MAX_CONCURRENT_FETCHES = int(os.getenv('MAX_CONCURRENT_FETCHES', 32))  # in-flight feed/image requests per worker
+    HTTP_CONNECTION_LIMIT = int(os.getenv('HTTP_CONNECTION_LIMIT', 100))
+    HTTP_CONNECTIONS_PER_HOST = int(os.getenv('HTTP_CONNECTIONS_PER_HOST', 4))
+    DNS_CACHE_TTL = int(os.getenv('DNS_CACHE_TTL', 300))  # seconds
+    FEED_STATE_MAX_FEEDS = int(os.getenv('FEED_STATE_MAX_FEEDS', 10000))  # feeds with per-URL state kept, least recently used dropped first
+    FEED_FETCH_TIMEOUT = float(os.getenv('FEED_FETCH_TIMEOUT', 10))  # seconds, upper bound of the adaptive timeout
+    FEED_FETCH_TIMEOUT_MIN = float(os.getenv('FEED_FETCH_TIMEOUT_MIN', 2))  # seconds, lower bound of the adaptive timeout
+    FEED_FAILURE_THRESHOLD = int(os.getenv('FEED_FAILURE_THRESHOLD', 3))  # consecutive failures before a feed is skipped
+    FEED_BACKOFF_BASE = float(os.getenv('FEED_BACKOFF_BASE', 60))  # seconds, doubles with every further failure
+    FEED_BACKOFF_MAX = float(os.getenv('FEED_BACKOFF_MAX', 6 * 60 * 60))  # seconds
+    IMAGE_FETCH_TIMEOUT = float(os.getenv('IMAGE_FETCH_TIMEOUT', 5))  # seconds
+
+    # Feed parsing pool
+    FEED_PARSER_EXECUTOR = os.getenv('FEED_PARSER_EXECUTOR', 'process')  # 'process' or 'thread'
+    FEED_PARSER_WORKERS = int(os.getenv('FEED_PARSER_WORKERS', 2))
+
+    # Parsed article store
+    ARTICLE_STORE_MAX_BYTES = int(os.getenv('ARTICLE_STORE_MAX_BYTES', 256 * 1024 * 1024))  # estimated, least recently used feeds go first
+    ARTICLE_FRESH_TTL = float(os.getenv('ARTICLE_FRESH_TTL', 2 * 60 * 60))  # seconds before a request refetches a feed ingestion does not keep fresh
+    ARTICLE_RETENTION = float(os.getenv('ARTICLE_RETENTION', 24 * 60 * 60))  # seconds before stale articles are dropped
+
+    # Article cache shared by every worker process, empty to disable
+    SHARED_CACHE_PATH = os.getenv('SHARED_CACHE_PATH', 'shared_articles.db')
+    SHARED_CACHE_LEASE_TTL = float(os.getenv('SHARED_CACHE_LEASE_TTL', 30))  # seconds before another worker may take over writing
+    SHARED_CACHE_POLL_INTERVAL = float(os.getenv('SHARED_CACHE_POLL_INTERVAL', 10))  # seconds, keep below the lease TTL
+
+    # Near-duplicate collapsing
+    DEDUP_ENABLED = os.getenv('DEDUP_ENABLED', 'true').lower() == 'true'
+    DEDUP_THRESHOLD = float(os.getenv('DEDUP_THRESHOLD', 0.6))  # estimated word Jaccard similarity of the same story
+    DEDUP_INDEX_SIZE = int(os.getenv('DEDUP_INDEX_SIZE', 50000))  # fingerprints kept, oldest dropped first
+
+    # Tokenization
+    TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 100000))  # distinct texts kept tokenized, least recently used dropped first
+    TOKEN_VOCABULARY_SIZE = int(os.getenv('TOKEN_VOCABULARY_SIZE', 500000))  # distinct tokens before the token cache starts over
+
+    # Thumbnails
+    THUMBNAIL_CACHE_DIR = os.getenv('THUMBNAIL_CACHE_DIR', 'thumbnail_cache')
+    THUMBNAIL_WORKERS = int(os.getenv('THUMBNAIL_WORKERS', 2))  # 0 resizes in a thread instead of a process pool
+    THUMBNAIL_CACHE_MAX_BYTES = int(os.getenv('THUMBNAIL_CACHE_MAX_BYTES', 512 * 1024 * 1024))  # on disk, least recently used deleted first
+    THUMBNAIL_SOURCE_MAX_BYTES = int(os.getenv('THUMBNAIL_SOURCE_MAX_BYTES', 10 * 1024 * 1024))  # larger source images are skipped
+    THUMBNAIL_MAX_AGE = int(os.getenv('THUMBNAIL_MAX_AGE', 7 * 24 * 60 * 60))  # Cache-Control max-age, seconds
+    PUBLIC_BASE_URL = os.getenv('PUBLIC_BASE_URL', '')  # prefix for thumbnail URLs handed to clients, empty uses each request's base URL
+
+    # Auth and profile caching
+    FIREBASE_CREDENTIALS = os.getenv('FIREBASE_CREDENTIALS', 'service_acc.json')
+    AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', 10000))
+    PROFILE_CACHE_SIZE = int(os.getenv('PROFILE_CACHE_SIZE', 10000))
+    PROFILE_CACHE_TTL = float(os.getenv('PROFILE_CACHE_TTL', 300))  # seconds
+
+    # Recommendation result cache
+    RESULT_CACHE_SOFT_TTL = float(os.getenv('RESULT_CACHE_SOFT_TTL', 60))  # seconds before a background refresh
+    RESULT_CACHE_HARD_TTL = float(os.getenv('RESULT_CACHE_HARD_TTL', 15 * 60))  # seconds before an entry is unusable
+    RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', 1024))
+
+    RECOMMENDATION_DEADLINE_MS = int(os.getenv('RECOMMENDATION_DEADLINE_MS', 0)) or None  # default latency budget, unset waits for every feed
+    RANKING_DEPTH = int(os.getenv('RANKING_DEPTH', 50))  # articles ranked per request, pages are slices of it
+
+    # Batch recommendations
+    BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', 0))  # processes ranking user chunks, 0 ranks in a thread
+    BATCH_CHUNK_SIZE = int(os.getenv('BATCH_CHUNK_SIZE', 1000))  # users per score matrix
+    BATCH_MAX_USERS = int(os.getenv('BATCH_MAX_USERS', 10000))  # per request to the batch endpoint
+
+    # Document frequency index
+    DF_INDEX_PATH = os.getenv('DF_INDEX_PATH', 'df_index.json')
+    DF_INDEX_SNAPSHOT_INTERVAL = float(os.getenv('DF_INDEX_SNAPSHOT_INTERVAL', 10 * 60))  # seconds
+
+    # Startup
+    WARMUP_ON_STARTUP = os.getenv('WARMUP_ON_STARTUP', 'false').lower() == 'true'  # rank a made-up article before serving, so the first request does not pay for imports
+
+    # Instrumentation
+    TIMING_BREAKDOWN_ALWAYS = os.getenv('TIMING_BREAKDOWN_ALWAYS', 'false').lower() == 'true'  # else only with X-Debug-Timing
+
+    ADMIN_API_KEY = os.getenv('ADMIN_API_KEY')
@@ -0,0 +1,94 @@
+import hashlib
+import re
+from collections import OrderedDict
+from .utils.cache import TTLCache
+
+_WORD = re.compile(r"\w+")
+_PRIME = 4294967311  # smallest prime above 2**32, keeps a * x + b inside uint64
+
+def _hash32(word: str) -> int:
+    return int.from_bytes(hashlib.blake2b(word.encode('utf-8'), digest_size=4).digest(), 'big')
+
+class MinHasher:
+    """MinHash signatures of word sets, `num_perm` universal hash functions seeded by `seed`."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        import numpy as np
+
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, 1 << 32, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=(num_perm, 1), dtype=np.uint64)
+
+    def signature(self, words: set):
+        import numpy as np
+
+        hashes = np.fromiter((_hash32(word) for word in words), dtype=np.uint64, count=len(words))
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1)
+
+class NearDuplicateIndex:
+    """
+    Clusters articles whose title + description word sets have an estimated Jaccard
+    similarity of at least `threshold`, e.g. one wire story carried by several outlets.
+
+    MinHash signatures are split into `bands` bands (LSH); only articles agreeing on
+    a whole band are compared. Each cluster is named after the first article seen in
+    it, and keeps one thumbnail for all its copies.
+    """
+
+    def __init__(self, threshold: float = 0.6, num_perm: int = 64, bands: int = 16, max_entries: int = 50000,
+                 thumbnail_ttl: float = 24 * 60 * 60, min_words: int = 5):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.min_words = min_words  # shorter texts have too little evidence to be called duplicates
+        self.num_perm = num_perm
+        self.rows = num_perm // bands
+        self._hasher = None  # built on first use, it needs numpy
+        self._buckets = [{} for _ in range(bands)]  # band bytes -> set of keys
+        self._entries = OrderedDict()  # key -> (signature, cluster), oldest first
+        self.thumbnails = TTLCache(max_entries, thumbnail_ttl)  # cluster -> thumbnail URL
+
+    def _band_keys(self, signature):
+        return [signature[b * self.rows:(b + 1) * self.rows].tobytes() for b in range(len(self._buckets))]
+
+    def add(self, key: str, text: str) -> str:
+        """Cluster of the article `key` (e.g. its link), indexing it if it is new."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            return entry[1]
+        words = set(_WORD.findall(text.lower()))
+        if len(words) < self.min_words:
+            return key  # never a duplicate
+
+        if self._hasher is None:
+            self._hasher = MinHasher(self.num_perm)
+        signature = self._hasher.signature(words)
+        band_keys = self._band_keys(signature)
+        candidates = set()
+        for buckets, band_key in zip(self._buckets, band_keys):
+            candidates.update(buckets.get(band_key, ()))
+        cluster, best_similarity = key, self.threshold
+        for other in candidates:
+            other_signature, other_cluster = self._entries[other]
+            similarity = float((signature == other_signature).mean())  # estimated Jaccard similarity
+            if similarity >= best_similarity:
+                cluster, best_similarity = other_cluster, similarity
+
+        self._entries[key] = (signature, cluster)
+        for buckets, band_key in zip(self._buckets, band_keys):
+            buckets.setdefault(band_key, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+        return cluster
+
+    def _remove(self, key: str):
+        signature, _ = self._entries.pop(key)
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            bucket = buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del buckets[band_key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
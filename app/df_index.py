@@ -0,0 +1,128 @@
+import asyncio
+import heapq
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from .scoring import smoothed_idf
+
+logger = logging.getLogger(__name__)
+
+def _write_snapshot(path: str, window_days: float, docs: Dict[str, Tuple[str, Tuple[str, ...]]]):
+    # A temp file of its own, other workers (or an overlapping write) may snapshot the same path
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=f"{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'window_days': window_days, 'docs': docs}, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+class DocumentFrequencyIndex:
+    """
+    Document frequencies over every ingested article published inside a sliding window.
+
+    Articles are added as they are ingested and dropped once they age out of the window,
+    so IDF lookups are plain dict reads instead of a refit per request. IDF uses the same
+    smoothed formula as scikit-learn's TfidfVectorizer.
+    """
+
+    def __init__(self, window: timedelta = timedelta(days=30)):
+        self.window = window
+        self.doc_freq = {}  # term -> number of documents containing it
+        self._docs = {}  # doc_id -> (published isoformat, terms)
+        self._expiry_heap = []  # (published, doc_id)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._docs
+
+    def add(self, doc_id: str, terms: Iterable[str], published: datetime) -> bool:
+        if published < datetime.now() - self.window:
+            return False
+        terms = tuple(sorted(set(terms)))
+        existing = self._docs.get(doc_id)
+        if existing is not None:
+            if existing[1] == terms:
+                return False
+            self.remove(doc_id)
+
+        self._docs[doc_id] = (published.isoformat(), terms)
+        heapq.heappush(self._expiry_heap, (published, doc_id))
+        for term in terms:
+            self.doc_freq[term] = self.doc_freq.get(term, 0) + 1
+        return True
+
+    def remove(self, doc_id: str):
+        doc = self._docs.pop(doc_id, None)
+        if doc is None:
+            return
+        for term in doc[1]:
+            count = self.doc_freq[term] - 1
+            if count:
+                self.doc_freq[term] = count
+            else:
+                del self.doc_freq[term]
+
+    def expire(self, now: Optional[datetime] = None) -> int:
+        cutoff = (now or datetime.now()) - self.window
+        expired = 0
+        while self._expiry_heap and self._expiry_heap[0][0] < cutoff:
+            published, doc_id = heapq.heappop(self._expiry_heap)
+            doc = self._docs.get(doc_id)
+            # Skip heap entries left behind by a re-added document
+            if doc is not None and doc[0] == published.isoformat():
+                self.remove(doc_id)
+                expired += 1
+        return expired
+
+    def idf(self, term: str) -> float:
+        df = self.doc_freq.get(term, 0)
+        if not df:
+            return 0.0  # unseen terms score nothing, like a term outside a fitted vocabulary
+        return smoothed_idf(len(self._docs), df)
+
+    def idf_values(self, terms: Iterable[str]) -> Dict[str, float]:
+        return {term: self.idf(term) for term in terms if term in self.doc_freq}
+
+    def export(self) -> Dict[str, Tuple[str, Tuple[str, ...]]]:
+        return dict(self._docs)  # shallow copy, values are immutable
+
+    def snapshot(self, path: str):
+        _write_snapshot(path, self.window.total_seconds() / 86400, self.export())
+
+    @classmethod
+    def load(cls, path: str, window: timedelta = timedelta(days=30), terms: Optional[Iterable[str]] = None) -> 'DocumentFrequencyIndex':
+        """The snapshot at `path`, keeping only `terms` when given (older snapshots hold every document term)."""
+        index = cls(window)
+        keep = frozenset(terms) if terms is not None else None
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return index
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable document frequency snapshot at %s", path)
+            return index
+        for doc_id, (published, doc_terms) in data.get('docs', {}).items():
+            if keep is not None:
+                doc_terms = keep.intersection(doc_terms)
+            index.add(doc_id, doc_terms, datetime.fromisoformat(published))
+        return index
+
+async def snapshot_periodically(index: DocumentFrequencyIndex, path: str, interval: float,
+                                should_snapshot: Optional[Callable[[], bool]] = None):
+    while True:
+        await asyncio.sleep(interval)
+        if should_snapshot is not None and not should_snapshot():
+            continue
+        try:
+            # Copy on the loop thread, serialize and write off it
+            await asyncio.to_thread(_write_snapshot, path, index.window.total_seconds() / 86400, index.export())
+        except Exception:
+            logger.exception("Failed to snapshot document frequency index to %s", path)
@@ -0,0 +1,143 @@
+import random
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import Dict, Optional
+
+class FeedHealth:
+    __slots__ = (
+        'url', 'successes', 'failures', 'consecutive_failures', 'parse_errors', 'status_codes',
+        'last_status', 'last_error', 'last_entry_count', 'last_success', 'last_failure',
+        'latency_ewma', 'latency_deviation', 'open_until',
+    )
+
+    def __init__(self, url: str):
+        self.url = url
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.parse_errors = 0
+        self.status_codes = Counter()
+        self.last_status = None
+        self.last_error = None
+        self.last_entry_count = None
+        self.last_success = None
+        self.last_failure = None
+        self.latency_ewma = None
+        self.latency_deviation = 0.0
+        self.open_until = 0.0  # circuit is open (feed skipped) until this time.time()
+
+    def to_dict(self, now: float) -> Dict:
+        return {
+            'url': self.url,
+            'state': 'open' if now < self.open_until else 'closed',
+            'retry_at': datetime.fromtimestamp(self.open_until).isoformat() if now < self.open_until else None,
+            'successes': self.successes,
+            'failures': self.failures,
+            'consecutive_failures': self.consecutive_failures,
+            'parse_errors': self.parse_errors,
+            'status_codes': {str(code): count for code, count in self.status_codes.items()},
+            'last_status': self.last_status,
+            'last_error': self.last_error,
+            'last_entry_count': self.last_entry_count,
+            'last_success': datetime.fromtimestamp(self.last_success).isoformat() if self.last_success else None,
+            'last_failure': datetime.fromtimestamp(self.last_failure).isoformat() if self.last_failure else None,
+            'latency_ms': round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+        }
+
+class FeedHealthRegistry:
+    """
+    Per-feed latency, status and error history with an exponential-backoff circuit breaker.
+
+    After `failure_threshold` consecutive failures a feed is skipped for
+    `base_backoff * 2**n` seconds (capped at `max_backoff`), then one probe is let
+    through. Timeouts adapt to each feed's observed latency. At most `max_feeds`
+    feeds are tracked, the least recently recorded ones are forgotten first.
+    """
+
+    def __init__(self, failure_threshold: int = 3, base_backoff: float = 60, max_backoff: float = 6 * 60 * 60,
+                 min_timeout: float = 2, max_timeout: float = 10, alpha: float = 0.2, max_feeds: int = 10000):
+        self.failure_threshold = failure_threshold
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.alpha = alpha  # EWMA smoothing factor
+        self.max_feeds = max_feeds
+        self._feeds = OrderedDict()  # url -> FeedHealth, least recently recorded first
+
+    def get(self, url: str) -> FeedHealth:
+        health = self._feeds.get(url)
+        if health is None:
+            health = self._feeds[url] = FeedHealth(url)
+            while len(self._feeds) > self.max_feeds:
+                self._feeds.popitem(last=False)
+        else:
+            self._feeds.move_to_end(url)
+        return health
+
+    def allow_request(self, url: str) -> bool:
+        health = self._feeds.get(url)
+        if health is None or health.consecutive_failures < self.failure_threshold:
+            return True
+        now = time.time()
+        if now < health.open_until:
+            return False
+        # Half-open: let this request probe, hold everyone else back while it runs
+        health.open_until = now + self.timeout_for(url)
+        return True
+
+    def timeout_for(self, url: str) -> float:
+        health = self._feeds.get(url)
+        if health is None or health.latency_ewma is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, health.latency_ewma + 4 * health.latency_deviation))
+
+    def _observe_latency(self, health: FeedHealth, latency: float):
+        if health.latency_ewma is None:
+            health.latency_ewma = latency
+            return
+        health.latency_deviation += self.alpha * (abs(latency - health.latency_ewma) - health.latency_deviation)
+        health.latency_ewma += self.alpha * (latency - health.latency_ewma)
+
+    def record_success(self, url: str, latency: float, status: int, entry_count: Optional[int] = None):
+        health = self.get(url)
+        health.successes += 1
+        health.consecutive_failures = 0
+        health.open_until = 0.0
+        health.status_codes[status] += 1
+        health.last_status = status
+        health.last_success = time.time()
+        if entry_count is not None:
+            health.last_entry_count = entry_count
+        self._observe_latency(health, latency)
+
+    def record_failure(self, url: str, latency: Optional[float] = None, status: Optional[int] = None,
+                       error: Optional[str] = None, parse_error: bool = False):
+        health = self.get(url)
+        health.failures += 1
+        health.consecutive_failures += 1
+        health.last_failure = time.time()
+        health.last_error = error
+        if status is not None:
+            health.status_codes[status] += 1
+            health.last_status = status
+        if parse_error:
+            health.parse_errors += 1
+        if latency is not None and status is not None:
+            self._observe_latency(health, latency)  # a timeout says nothing about how fast the host answers
+
+        if health.consecutive_failures >= self.failure_threshold:
+            exponent = health.consecutive_failures - self.failure_threshold
+            backoff = min(self.max_backoff, self.base_backoff * 2 ** min(exponent, 32))
+            health.open_until = health.last_failure + backoff * random.uniform(0.9, 1.1)
+
+    def report(self) -> Dict:
+        now = time.time()
+        feeds = [health.to_dict(now) for health in self._feeds.values()]
+        feeds.sort(key=lambda feed: (feed['state'] != 'open', -feed['consecutive_failures'], feed['url']))
+        return {
+            'feeds': feeds,
+            'open_circuits': sum(feed['state'] == 'open' for feed in feeds),
+            'tracked': len(feeds),
+        }
@@ -123,4 +123,12 @@ class FeedManager:
         for interest in user_interests:
             if interest in self.feed_sources:
                 feed_urls.extend(self.feed_sources[interest])
-        return feed_urls
\ No newline at end of file
+        return feed_urls
+
+    def get_all_feeds(self) -> List[str]:
+        """
+        Get every known feed URL, without duplicates.
+        Returns:
+            List of feed URLs
+        """
+        return list(dict.fromkeys(url for urls in self.feed_sources.values() for url in urls))
\ No newline at end of file
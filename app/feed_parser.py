@@ -1,107 +1,227 @@
-import feedparser
 import aiohttp
-import numpy as np
 from typing import List, Dict, Optional
-from datetime import datetime, timedelta
-from bs4 import BeautifulSoup
-import base64
-from io import BytesIO
-from PIL import Image
-import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import asyncio
+import logging
+import time
+from urllib.parse import urlsplit
+from .config import Config
+from .metrics import timed, FEED_CACHE_REQUESTS, FEED_FETCHES, IMAGE_FETCHES
+from .parsing import parse_feed_content
+from .thumbnails import ThumbnailService
+from .feed_health import FeedHealthRegistry
+from .article_store import Article, ArticleStore
+from .dedup import NearDuplicateIndex
+from .utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
 
 class FeedParser:
     def __init__(self):
         self.session = None
-        self.feed_cache = {}
-        self.cache_expiry = timedelta(hours=2)
+        self.feed_cache = ArticleStore(
+            max_bytes=Config.ARTICLE_STORE_MAX_BYTES,
+            fresh_ttl=Config.ARTICLE_FRESH_TTL,
+            retention=Config.ARTICLE_RETENTION,
+        )
+        # url -> ETag / Last-Modified from the last 200 response, only useful while its articles are retained
+        self.feed_validators = TTLCache(Config.FEED_STATE_MAX_FEEDS, Config.ARTICLE_RETENTION)
+        self.fetch_semaphore = asyncio.Semaphore(Config.MAX_CONCURRENT_FETCHES)
+        self.metric_hosts = frozenset() # hosts with their own fetch metrics label, the rest share 'other'
+        self.thumbnails = ThumbnailService(
+            Config.THUMBNAIL_CACHE_DIR,
+            base_url=Config.PUBLIC_BASE_URL,
+            max_workers=Config.THUMBNAIL_WORKERS,
+            max_bytes=Config.THUMBNAIL_CACHE_MAX_BYTES,
+        )
+        self.max_image_bytes = Config.THUMBNAIL_SOURCE_MAX_BYTES
+        self.parse_executor = None
+        self.health = FeedHealthRegistry(
+            failure_threshold=Config.FEED_FAILURE_THRESHOLD,
+            base_backoff=Config.FEED_BACKOFF_BASE,
+            max_backoff=Config.FEED_BACKOFF_MAX,
+            min_timeout=Config.FEED_FETCH_TIMEOUT_MIN,
+            max_timeout=Config.FEED_FETCH_TIMEOUT,
+            max_feeds=Config.FEED_STATE_MAX_FEEDS,
+        )
+        self.image_timeout = aiohttp.ClientTimeout(total=Config.IMAGE_FETCH_TIMEOUT)
+        self.duplicates = NearDuplicateIndex(
+            threshold=Config.DEDUP_THRESHOLD,
+            max_entries=Config.DEDUP_INDEX_SIZE,
+        ) if Config.DEDUP_ENABLED else None
+
+    def get_parse_executor(self):
+        if self.parse_executor is None:
+            if Config.FEED_PARSER_EXECUTOR == 'thread':
+                self.parse_executor = ThreadPoolExecutor(max_workers=Config.FEED_PARSER_WORKERS)
+            else:
+                self.parse_executor = ProcessPoolExecutor(max_workers=Config.FEED_PARSER_WORKERS)
+        return self.parse_executor
 
     async def get_session(self):
         if self.session is None:
-            self.session = aiohttp.ClientSession()
+            connector = aiohttp.TCPConnector(
+                limit=Config.HTTP_CONNECTION_LIMIT,
+                limit_per_host=Config.HTTP_CONNECTIONS_PER_HOST,
+                ttl_dns_cache=Config.DNS_CACHE_TTL,
+            )
+            self.session = aiohttp.ClientSession(connector=connector)
         return self.session
 
+    def _conditional_headers(self, url: str) -> Dict[str, str]:
+        validators = self.feed_validators.get(url, {})
+        headers = {}
+        if validators.get('etag'):
+            headers['If-None-Match'] = validators['etag']
+        if validators.get('last_modified'):
+            headers['If-Modified-Since'] = validators['last_modified']
+        return headers
+
     async def fetch_image(self, image_url: str) -> Optional[str]:
+        """Download and thumbnail an image, returning the URL it is served from."""
         if not image_url:
             return None
+        cached_url = self.thumbnails.cached_url(image_url)
+        if cached_url:
+            IMAGE_FETCHES.inc(outcome='cached')
+            return cached_url
         try:
-            session = await self.get_session()
-            async with session.get(image_url) as response:
-                if response.status == 200:
-                    image_data = await response.read()
-                    img = Image.open(BytesIO(image_data)).convert('RGB')
-                    if img.size[0] > 300 or img.size[1] > 300:
-                        img.thumbnail((300, 300))
-                    buffered = BytesIO()
-                    img.save(buffered, format="JPEG")
-                    return f"data:image/jpeg;base64,{base64.b64encode(buffered.getvalue()).decode()}"
-                return None
-        except Exception:
+            with timed('image'):
+                session = await self.get_session()
+                async with self.fetch_semaphore:
+                    async with session.get(image_url, timeout=self.image_timeout) as response:
+                        if response.status != 200:
+                            IMAGE_FETCHES.inc(outcome='http_error')
+                            return None
+                        image_data = await self._read_image(response)
+                        if image_data is None:
+                            IMAGE_FETCHES.inc(outcome='too_large')
+                            return None
+                thumbnail_url = await self.thumbnails.store(image_url, image_data)
+            IMAGE_FETCHES.inc(outcome='ok')
+            return thumbnail_url
+        except Exception as e:
+            IMAGE_FETCHES.inc(outcome='error')
+            logger.debug("Image fetch failed for %s: %r", image_url, e)
+            return None
+
+    async def _read_image(self, response) -> Optional[bytes]:
+        """The response body, or None once it exceeds `max_image_bytes`."""
+        if response.content_length is not None and response.content_length > self.max_image_bytes:
             return None
+        chunks, size = [], 0
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            size += len(chunk)
+            if size > self.max_image_bytes:
+                return None
+            chunks.append(chunk)
+        return b''.join(chunks)
 
-    async def parse_feed(self, url: str, auth: Optional[Dict] = None) -> List[Dict]:
-        cached_feed = self.feed_cache.get(url)
-        if cached_feed and datetime.now() < cached_feed['expiry']:
-            return cached_feed['entries']
+    async def fetch_story_image(self, entry: Dict) -> Optional[str]:
+        """Thumbnail for an entry, shared by every near-duplicate copy of the same story."""
+        if self.duplicates is None or not entry['thumbnail']:
+            return await self.fetch_image(entry['thumbnail'])
+        text = f"{entry['title']} {entry['description']}"
+        cluster = self.duplicates.add(entry['link'] or text, text)
+        thumbnail_url = self.duplicates.thumbnails.get(cluster)
+        if thumbnail_url is None:
+            thumbnail_url = await self.fetch_image(entry['thumbnail'])
+            if thumbnail_url:
+                self.duplicates.thumbnails.set(cluster, thumbnail_url)
+        else:
+            IMAGE_FETCHES.inc(outcome='duplicate')
+        return thumbnail_url
+
+    async def parse_feed(self, url: str, auth: Optional[Dict] = None, force_refresh: bool = False) -> List[Article]:
+        cached_entries = self.feed_cache.get(url)
+        if cached_entries is not None and not force_refresh and self.feed_cache.is_fresh(url):
+            FEED_CACHE_REQUESTS.inc(result='hit')
+            return cached_entries
+        FEED_CACHE_REQUESTS.inc(result='miss')
+        if not self.health.allow_request(url):
+            FEED_FETCHES.inc(outcome='skipped')
+            return cached_entries if cached_entries is not None else [] # circuit open, serve whatever we still have
+        host = urlsplit(url).hostname
+        if host not in self.metric_hosts: # feed_urls come from clients, keep the label set bounded
+            host = 'other'
+        status = None
+        start = None
+        recorded = False # health already has this attempt's outcome
 
         try:
             session = await self.get_session()
             headers = {'User-Agent': 'Mozilla/5.0'}
+            if cached_entries is not None: # only revalidate when there is something to fall back on
+                headers.update(self._conditional_headers(url))
             if auth:
                 headers.update(auth)
+            timeout = aiohttp.ClientTimeout(total=self.health.timeout_for(url))
 
-            async with session.get(url, timeout=10, headers=headers) as response:
-                if response.status != 200:
-                    return []
-
-                feed_content = await response.text()
-                feed = feedparser.parse(feed_content)
-                all_entries = feed.entries
-                np.random.shuffle(all_entries)
-                entries = []
-                for entry in all_entries[:20]:
-                    thumbnail = None
-                    if hasattr(entry, 'media_thumbnail'):
-                        thumbnail = entry.media_thumbnail[0]['url']
-                    elif hasattr(entry, 'media_content'):
-                        thumbnail = entry.media_content[0]['url']
-                    else:
-                        content = entry.get('description', '') or entry.get('summary', '')
-                        soup = BeautifulSoup(content, 'html.parser')
-                        img = soup.find('img')
-                        if img and img.get('src'):
-                            thumbnail = img['src']
-
-                    thumbnail_data = await self.fetch_image(thumbnail) if thumbnail else None
-                    published = entry.get('published_parsed') or entry.get('updated_parsed')
-                    if published:
-                        published = datetime(*published[:6]).isoformat()
-
-                    entries.append({
-                        'title': entry.get('title', ''),
-                        'description': self._clean_html(entry.get('description', '') or entry.get('summary', '')),
-                        'link': entry.get('link', ''),
-                        'published': published,
-                        'thumbnail': thumbnail_data,
-                        'author': entry.get('author', ''),
-                        'categories': entry.get('tags', []),
-                    })
-                self.feed_cache[url] = {
-                    'entries': entries,
-                    'expiry': datetime.now() + self.cache_expiry
-                }
-                return entries
-
-        except Exception:
-            return []
+            # The semaphore covers the request only, image fetches below take their own slot
+            with timed('feed_fetch', host=host):
+                async with self.fetch_semaphore:
+                    start = time.perf_counter()
+                    async with session.get(url, timeout=timeout, headers=headers) as response:
+                        status = response.status
+                        if response.status == 304 and cached_entries is not None:
+                            FEED_FETCHES.inc(outcome='not_modified')
+                            recorded = True
+                            self.health.record_success(url, time.perf_counter() - start, status)
+                            self.feed_cache.touch(url)
+                            return cached_entries
+                        if response.status != 200:
+                            FEED_FETCHES.inc(outcome='http_error')
+                            recorded = True
+                            self.health.record_failure(url, time.perf_counter() - start, status=status, error=f"HTTP {status}")
+                            logger.info("Feed %s returned HTTP %s", url, response.status)
+                            return []
+
+                        feed_content = await response.text()
+                        validators = {
+                            'etag': response.headers.get('ETag'),
+                            'last_modified': response.headers.get('Last-Modified'),
+                        }
+                    latency = time.perf_counter() - start
+            FEED_FETCHES.inc(outcome='ok')
+
+            # feedparser and HTML stripping are CPU-bound, keep them off the event loop
+            loop = asyncio.get_running_loop()
+            try:
+                with timed('parse'):
+                    entries = await loop.run_in_executor(self.get_parse_executor(), parse_feed_content, feed_content)
+            except Exception as e:
+                recorded = True
+                self.health.record_failure(url, latency, status=status, error=repr(e), parse_error=True)
+                raise
+            recorded = True
+            if entries:
+                self.health.record_success(url, latency, status, entry_count=len(entries))
+            else:
+                self.health.record_failure(url, latency, status=status, error="No entries", parse_error=True)
+                if cached_entries is not None:
+                    return cached_entries # keep the previous articles, and the validators that describe them
+            self.feed_validators.set(url, validators)
 
-    def _clean_html(self, html_content: str) -> str:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        text = soup.get_text()
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text[:200] + '...' if len(text) > 200 else text
+            # Images download concurrently, bounded by the shared fetch semaphore
+            thumbnail_urls = await asyncio.gather(*(self.fetch_story_image(entry) for entry in entries))
+            for entry, thumbnail_url in zip(entries, thumbnail_urls):
+                entry['thumbnail'] = thumbnail_url
+
+            return self.feed_cache.put(url, entries)
+
+        except Exception as e:
+            FEED_FETCHES.inc(outcome='error')
+            if not recorded: # connection error, timeout, invalid URL, or a body that stalled or failed to decode
+                latency = time.perf_counter() - start if start is not None else None
+                self.health.record_failure(url, latency, status=status, error=repr(e))
+            logger.warning("Failed to fetch or parse feed %s: %r", url, e)
+            return []
 
     async def close(self):
+        self.thumbnails.close()
+        if self.parse_executor:
+            self.parse_executor.shutdown(wait=False, cancel_futures=True)
+            self.parse_executor = None
         if self.session:
             await self.session.close()
             self.session = None
\ No newline at end of file
@@ -0,0 +1,75 @@
+import asyncio
+import inspect
+import logging
+import random
+from typing import Awaitable, Callable, List, Dict, Optional, Union
+from .feed_parser import FeedParser
+
+logger = logging.getLogger(__name__)
+
+class FeedIngestionService:
+    """
+    Crawls every known feed on its own schedule and keeps its article store warm,
+    so recommendation requests never wait on a live fetch.
+    """
+
+    def __init__(
+        self,
+        feed_parser: FeedParser,
+        feed_urls: List[str],
+        default_interval: float,
+        interval_overrides: Optional[Dict[str, float]] = None,
+        jitter: float = 0.1,
+        startup_spread: float = 0.0,
+        on_entries: Optional[Callable[[str, List[Dict]], Union[None, Awaitable[None]]]] = None,
+    ):
+        self.feed_parser = feed_parser
+        self.feed_urls = list(dict.fromkeys(feed_urls))  # dedupe, keep order
+        self.default_interval = default_interval
+        self.interval_overrides = interval_overrides or {}
+        self.jitter = jitter
+        self.startup_spread = startup_spread
+        self.on_entries = on_entries  # called (and awaited if async) with every freshly parsed feed, e.g. to update indexes
+        self._tasks = {}
+
+    def interval_for(self, url: str) -> float:
+        return self.interval_overrides.get(url, self.default_interval)
+
+    def _next_delay(self, url: str) -> float:
+        interval = self.interval_for(url)
+        return max(1.0, interval * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    async def refresh_feed(self, url: str) -> int:
+        # Fresh entries land in the parser's article store; on failure it keeps the previous ones
+        entries = await self.feed_parser.parse_feed(url, force_refresh=True)
+        if entries and self.on_entries:
+            result = self.on_entries(url, entries)
+            if inspect.isawaitable(result):
+                await result
+        return len(entries)
+
+    async def refresh(self, urls: Optional[List[str]] = None) -> Dict[str, int]:
+        urls = urls or self.feed_urls
+        counts = await asyncio.gather(*(self.refresh_feed(url) for url in urls))
+        return dict(zip(urls, counts))
+
+    async def _run_feed(self, url: str):
+        await asyncio.sleep(random.uniform(0, self.startup_spread))
+        while True:
+            try:
+                await self.refresh_feed(url)
+            except Exception:
+                logger.exception("Feed ingestion failed for %s", url)
+            await asyncio.sleep(self._next_delay(url))
+
+    def start(self):
+        for url in self.feed_urls:
+            if url not in self._tasks:
+                self._tasks[url] = asyncio.create_task(self._run_feed(url))
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        self._tasks = {}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,167 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Per-request stage durations, only set when a timing breakdown was asked for
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar('request_timings', default=None)
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+class Counter:
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(labels)} {value}"
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self._values = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            values = self._values.get(key)
+            if values is None:
+                values = self._values[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                values[index] += 1
+            values[-2] += value
+            values[-1] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, values in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(labels, (('le', repr(bound)),))} {cumulative}"
+            yield f"{self.name}_bucket{_format_labels(labels, (('le', '+Inf'),))} {values[-1]}"
+            yield f"{self.name}_sum{_format_labels(labels)} {values[-2]}"
+            yield f"{self.name}_count{_format_labels(labels)} {values[-1]}"
+
+class CallbackMetric:
+    """Metric whose samples are read from `callback` at scrape time, e.g. cache stats."""
+
+    def __init__(self, name: str, documentation: str, metric_type: str, callback: Callable[[], Dict[Tuple[Tuple[str, str], ...], float]]):
+        self.name = name
+        self.documentation = documentation
+        self.metric_type = metric_type
+        self.callback = callback
+
+    def render(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.metric_type}"
+        for labels, value in sorted(self.callback().items()):
+            yield f"{self.name}{_format_labels(labels)} {value}"
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self._metrics.get(name) or self._register(Counter(name, documentation))
+
+    def histogram(self, name: str, documentation: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._metrics.get(name) or self._register(Histogram(name, documentation, buckets))
+
+    def callback(self, name: str, documentation: str, metric_type: str, callback) -> CallbackMetric:
+        return self._register(CallbackMetric(name, documentation, metric_type, callback))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        return '\n'.join(line for metric in self._metrics.values() for line in metric.render()) + '\n'
+
+registry = MetricsRegistry()
+
+STAGE_DURATION = registry.histogram('recommender_stage_duration_seconds', 'Time spent in each processing stage.')
+STAGE_ERRORS = registry.counter('recommender_stage_errors_total', 'Exceptions raised (and swallowed) per stage.')
+FEED_CACHE_REQUESTS = registry.counter('recommender_feed_cache_requests_total', 'Article store lookups by result.')
+FEED_FETCHES = registry.counter('recommender_feed_fetches_total', 'Feed HTTP fetches by outcome.')
+IMAGE_FETCHES = registry.counter('recommender_image_fetches_total', 'Thumbnail image fetches by outcome.')
+HTTP_REQUEST_DURATION = registry.histogram('recommender_http_request_duration_seconds', 'HTTP request latency by route.')
+
+@contextmanager
+def timed(stage: str, **labels):
+    """Record the duration of the block in the stage histogram and the request breakdown."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage, **labels)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_DURATION.observe(elapsed, stage=stage, **labels)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+class TimingMiddleware:
+    """
+    ASGI middleware recording request latency per route. When the request sends
+    the debug header (or `always_breakdown` is set), the response carries a
+    Server-Timing header with the summed duration of every stage.
+    """
+
+    def __init__(self, app, debug_header: str = 'x-debug-timing', always_breakdown: bool = False):
+        self.app = app
+        self.debug_header = debug_header.lower().encode('latin-1')
+        self.always_breakdown = always_breakdown
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        wants_breakdown = self.always_breakdown or any(
+            name == self.debug_header and value not in (b'', b'0', b'false') for name, value in scope['headers']
+        )
+        timings = {} if wants_breakdown else None
+        token = _request_timings.set(timings)
+        start = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start' and timings is not None:
+                header = ', '.join(f"{stage};dur={duration * 1000:.1f}" for stage, duration in timings.items())
+                if header:
+                    message = {**message, 'headers': list(message.get('headers', [])) + [(b'server-timing', header.encode('latin-1'))]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            route = scope.get('route')
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, route=getattr(route, 'path', 'unmatched'))
+            _request_timings.reset(token)
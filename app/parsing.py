@@ -0,0 +1,78 @@
+import random
+import re
+from datetime import datetime
+from html.parser import HTMLParser
+from typing import List, Dict, Optional, Tuple
+
+class _HTMLStripper(HTMLParser):
+    """Single-pass HTML to text stripper that also remembers the first <img src>."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.first_image = None
+
+    def handle_data(self, data):
+        self.parts.append(data)
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'img' and self.first_image is None:
+            src = dict(attrs).get('src')
+            if src:
+                self.first_image = src
+
+    handle_startendtag = handle_starttag
+
+def strip_html(html_content: str) -> Tuple[str, Optional[str]]:
+    stripper = _HTMLStripper()
+    try:
+        stripper.feed(html_content)
+        stripper.close()
+    except Exception: # malformed markup, keep whatever was collected
+        pass
+    return ''.join(stripper.parts), stripper.first_image
+
+def truncate_text(text: str) -> str:
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text[:200] + '...' if len(text) > 200 else text
+
+def clean_html(html_content: str) -> str:
+    return truncate_text(strip_html(html_content)[0])
+
+def parse_feed_content(feed_content: str, max_entries: int = 20) -> List[Dict]:
+    """
+    Parse raw feed XML into plain article dicts. CPU-bound and picklable end to end,
+    so it can run in a process or thread pool. 'thumbnail' holds the source image URL.
+    """
+    import feedparser  # imported in the parser pool, not at app startup
+
+    feed = feedparser.parse(feed_content)
+    all_entries = list(feed.entries)
+    random.shuffle(all_entries)
+    entries = []
+    for entry in all_entries[:max_entries]:
+        content = entry.get('description', '') or entry.get('summary', '')
+        text, inline_image = strip_html(content)
+
+        thumbnail = None
+        if hasattr(entry, 'media_thumbnail'):
+            thumbnail = entry.media_thumbnail[0]['url']
+        elif hasattr(entry, 'media_content'):
+            thumbnail = entry.media_content[0]['url']
+        else:
+            thumbnail = inline_image
+
+        published = entry.get('published_parsed') or entry.get('updated_parsed')
+        if published:
+            published = datetime(*published[:6]).isoformat()
+
+        entries.append({
+            'title': entry.get('title', ''),
+            'description': truncate_text(text),
+            'link': entry.get('link', ''),
+            'published': published,
+            'thumbnail': thumbnail,
+            'author': entry.get('author', ''),
+            'categories': [dict(tag) for tag in entry.get('tags', [])],
+        })
+    return entries
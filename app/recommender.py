@@ -1,84 +1,66 @@
 from .feed_parser import FeedParser
+from .result_cache import RecommendationResultCache
+from .df_index import DocumentFrequencyIndex
+from .topic_index import TopicKeywordIndex, rank_users
+from .config import Config
+from .metrics import timed
+from .scoring import TopicScoringEngine, freshness_bonus, keyword_weight
+from .tokens import TokenCache
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter
 from datetime import datetime, timedelta
 import asyncio
-from sklearn.feature_extraction.text import TfidfVectorizer
-import nltk
-from nltk.corpus import stopwords
 import string
-
-nltk.download('stopwords', quiet=True) # Download stopwords if you haven't already
+from .utils.helpers import load_stopwords
 
 class TopicBasedRecommender:
     def __init__(self):
         self.feed_parser = FeedParser()
-        self.stop_words = set(stopwords.words('english'))
+        self.article_store = self.feed_parser.feed_cache # filled by fetches and the background ingestion service
+        self._refreshing = {} # url -> background refresh task
+        self.managed_feeds = frozenset() # kept fresh by ingestion (here or in the shared cache writer), never refetched on request
+        self.batch_executor = None # process pool for batch ranking, created on first use
+        self.result_cache = RecommendationResultCache(
+            soft_ttl=Config.RESULT_CACHE_SOFT_TTL,
+            hard_ttl=Config.RESULT_CACHE_HARD_TTL,
+            max_entries=Config.RESULT_CACHE_SIZE,
+        )
+        self.stop_words = load_stopwords('english')
         self.punctuation = string.punctuation
+        self.token_cache = TokenCache( # each distinct text tokenized once
+            self.stop_words, self.punctuation, max_entries=Config.TOKEN_CACHE_SIZE, max_vocabulary=Config.TOKEN_VOCABULARY_SIZE,
+        )
+        self.scoring_engine = TopicScoringEngine(self.token_cache) # topic keywords preprocessed once
+        self.df_index = DocumentFrequencyIndex() # IDF statistics over ingested articles
+        self.topic_index = TopicKeywordIndex( # keyword postings per stored feed, budgeted and evicted with its articles
+            self.scoring_engine, store=self.article_store, duplicates=self.feed_parser.duplicates,
+        )
 
     def preprocess_text(self, text):
-        text = text.lower()
-        text = ''.join([char for char in text if char not in self.punctuation]) # Remove punctuation
-        tokens = text.split()
-        tokens = [token for token in tokens if token not in self.stop_words] # Remove stopwords
-        return " ".join(tokens) # Return as string for TfidfVectorizer
+        return self.token_cache.preprocess(text) # lowercased, punctuation and stopwords removed, cached per text
 
     def calculate_tfidf_score(self, article_text, interest_keywords, idf_values): # idf_values passed in
-        article_text = self.preprocess_text(article_text)
+        token_ids = self.token_cache.get(article_text).ids
+        if not token_ids:
+            return 0
+        counts = Counter(token_ids)
+        vocabulary = self.token_cache.vocabulary
         score = 0
         for interest, keywords in interest_keywords.items(): # interest_keywords is now a dict
             for keyword in keywords:
                 keyword = self.preprocess_text(keyword) # preprocess keywords too for matching
-                if keyword in article_text:
-                    tf = article_text.split().count(keyword) / len(article_text.split()) if article_text.split() else 0 # TF calculation
+                count = counts.get(vocabulary.get(keyword), 0) # only whole tokens count, multi-word keywords never match
+                if count:
+                    tf = count / len(token_ids) # TF calculation
                     idf = idf_values.get(keyword, 0) # Get pre-calculated IDF, default to 0 if keyword not in IDF vocab
-                    score += tf * idf * 2 # TF-IDF score, doubled for interest relevance
+                    score += tf * keyword_weight(idf) # TF-IDF score, doubled for interest relevance
         return score
 
 
     def calculate_topic_score(self, text, interests, published_date_str, corpus_texts): # corpus_texts added
-        processed_texts = [self.preprocess_text(doc) for doc in corpus_texts] # preprocess corpus
-        vectorizer = TfidfVectorizer()
-        vectorizer.fit(processed_texts) # Fit on the corpus to learn IDF values
-        idf_values_dict = dict(zip(vectorizer.get_feature_names_out(), vectorizer.idf_)) # create dict for IDF lookup
-
-
-        topic_keywords_tfidf = { # Use processed keywords for TF-IDF
-            'Technology': [self.preprocess_text(kw) for kw in ['tech', 'software', 'digital', 'ai', 'computer', 'app', 'cyber', 'innovation', 'programming', 'gadget', 'electronics', 'internet']],
-            'Science': [self.preprocess_text(kw) for kw in ['research', 'study', 'scientist', 'discovery', 'lab', 'physics', 'chemistry', 'biology', 'astronomy', 'experiment', 'scientific']],
-            'Business': [self.preprocess_text(kw) for kw in ['market', 'company', 'startup', 'finance', 'industry', 'trade', 'economy', 'investment', 'business', 'entrepreneur', 'commerce']],
-            'Arts': [self.preprocess_text(kw) for kw in ['artist', 'exhibition', 'museum', 'gallery', 'painting', 'sculpture', 'art', 'design', 'creative', 'artwork', 'culture']],
-            'Politics': [self.preprocess_text(kw) for kw in ['government', 'policy', 'election', 'congress', 'political', 'vote', 'democracy', 'president', 'legislation', 'campaign', 'civic']],
-            'Food': [self.preprocess_text(kw) for kw in ['recipe', 'restaurant', 'cuisine', 'cooking', 'chef', 'meal', 'food', 'dining', 'ingredients', 'gourmet', 'culinary']],
-            'Fashion': [self.preprocess_text(kw) for kw in ['style', 'design', 'fashion', 'trend', 'collection', 'wear', 'clothing', 'apparel', 'luxury', 'couture', 'stylish']],
-            'Movies': [self.preprocess_text(kw) for kw in ['film', 'movie', 'cinema', 'director', 'actor', 'hollywood', 'screen', 'drama', 'comedy', 'thriller', 'animation']],
-            'Sports': [self.preprocess_text(kw) for kw in ['game', 'player', 'team', 'tournament', 'championship', 'athlete', 'sport', 'football', 'basketball', 'soccer', 'tennis']],
-            'Health': [self.preprocess_text(kw) for kw in ['medical', 'health', 'wellness', 'therapy', 'treatment', 'doctor', 'disease', 'medicine', 'healthcare', 'fitness', 'nutrition']],
-            'Music': [self.preprocess_text(kw) for kw in ['song', 'album', 'artist', 'band', 'concert', 'musical', 'music', 'genre', 'melody', 'rhythm', 'lyrics']],
-            'Gaming': [self.preprocess_text(kw) for kw in ['game', 'gaming', 'player', 'console', 'esports', 'developer', 'videogame', 'pc', 'playstation', 'xbox', 'nintendo']],
-            'Environment': [self.preprocess_text(kw) for kw in ['climate', 'environmental', 'sustainable', 'energy', 'eco', 'nature', 'pollution', 'conservation', 'planet', 'ecology', 'green']],
-            'Travel': [self.preprocess_text(kw) for kw in ['destination', 'tourism', 'travel', 'hotel', 'vacation', 'tour', 'adventure', 'explore', 'holiday', 'journey', 'trip']],
-            'Education': [self.preprocess_text(kw) for kw in ['school', 'university', 'learning', 'student', 'teacher', 'course', 'education', 'knowledge', 'study', 'academic', 'college']]
-        }
-
-
-        article_score = self.calculate_tfidf_score(text, topic_keywords_tfidf, idf_values_dict)
-
-
-        if published_date_str: # Freshness bonus remains the same
-            try:
-                published_date = datetime.fromisoformat(published_date_str.replace('Z', '+00:00'))
-                now = datetime.now()
-                age_days = (now - published_date).days
-                freshness_bonus = 0
-                if age_days <= 7:
-                    freshness_bonus = 5
-                elif age_days <= 14:
-                    freshness_bonus = 3
-                elif age_days <= 30:
-                    freshness_bonus = 1
-                article_score += freshness_bonus
-            except (ValueError, AttributeError, TypeError):
-                pass
-        return article_score
+        idf_values_dict = self.scoring_engine.fit_idf(corpus_texts) # IDF lookup for topic keywords
+        article_score = self.calculate_tfidf_score(text, self.scoring_engine.topic_keywords, idf_values_dict)
+        return article_score + freshness_bonus([published_date_str])[0]
 
     def is_within_date_range(self, article_date_str):
         try:
@@ -102,31 +84,222 @@ class TopicBasedRecommender:
             return False
         return self.is_within_date_range(article['published'])
 
-    async def get_recommendations(self, user_profile: str, feed_urls: list, user_interests: list, n_recommendations=5):
-        tasks = [self.feed_parser.parse_feed(url) for url in feed_urls]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        all_articles = []
-        corpus_texts = [] # Collect corpus texts here
-        for entries in results:
-            if isinstance(entries, list):
-                for entry in entries:
-                    if self.is_valid_article(entry):
-                        content = f"{entry['title']} {entry['description']}"
-                        corpus_texts.append(content) # Add to corpus
-
-        for entries in results: # Separate loop to calculate scores after corpus is built
-            if isinstance(entries, list):
-                for entry in entries:
-                    if self.is_valid_article(entry):
-                        content = f"{entry['title']} {entry['description']}"
-                        score = self.calculate_topic_score(content, user_interests, entry.get('published'), corpus_texts) # pass corpus texts
-                        all_articles.append((entry, score))
-
-
-        all_articles.sort(key=lambda x: x[1], reverse=True)
-        recommendations = [article for article, _ in all_articles[:n_recommendations]]
-        return recommendations
-
-    async def close(self): # No change needed here
+    def index_articles(self, url, entries):
+        for entry in entries:
+            if self.is_valid_article(entry):
+                # Only topic keywords are ever looked up, every article still counts towards the total
+                keywords = self.scoring_engine.document_keywords(self.token_cache.get(f"{entry['title']} {entry['description']}"))
+                published = datetime.fromisoformat(entry['published'].replace('Z', '+00:00'))
+                self.df_index.add(entry['link'], keywords, published)
+        self.df_index.expire()
+
+    async def get_feed_entries(self, url):
+        entries = self.article_store.get(url)
+        if entries is None:
+            return await self.feed_parser.parse_feed(url) # never fetched (or evicted), fetch it live
+        if url not in self.managed_feeds and not self.article_store.is_fresh(url):
+            self.refresh_feed(url) # serve the stale articles, refetch in the background
+        return entries
+
+    def refresh_feed(self, url):
+        if url not in self._refreshing:
+            task = asyncio.create_task(self.feed_parser.parse_feed(url, force_refresh=True))
+            self._refreshing[url] = task
+            task.add_done_callback(lambda t: self._refreshing.pop(url, None))
+
+    async def get_recommendations(self, user_profile: str, feed_urls: list, user_interests: list, n_recommendations=5, offset=0):
+        ranking, _ = await self.get_recommendations_within(user_profile, feed_urls, user_interests, n_recommendations, offset)
+        return ranking
+
+    async def get_recommendations_within(self, user_profile: str, feed_urls: list, user_interests: list, n_recommendations=5, offset=0, deadline=None):
+        """
+        Like get_recommendations, but when `deadline` (seconds) expires first, ranks
+        whatever feeds have arrived so far. Returns (recommendations, complete).
+        """
+        # Rank (and cache) a fixed depth so later pages are slices of the same ranking
+        depth = max(Config.RANKING_DEPTH, offset + n_recommendations)
+        user_interests = self.topic_index.topics_for(user_interests) # one cache entry per effective topic set
+        key = self.result_cache.make_key(user_interests, feed_urls, depth)
+        ranking_task = asyncio.ensure_future(self.result_cache.get_or_compute(
+            key, lambda: self.compute_recommendations(feed_urls, user_interests, depth)
+        ))
+        # Retrieve the outcome even if nobody awaits the task any more
+        ranking_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        done, _ = await asyncio.wait({ranking_task}, timeout=deadline)
+        if done:
+            return ranking_task.result()[offset:offset + n_recommendations], True
+
+        # The full computation keeps running and fills the caches for the next request
+        ranking = self.rank_feeds(list(self.get_available_feeds(feed_urls)), user_interests, depth)
+        return ranking[offset:offset + n_recommendations], False
+
+    async def stream_recommendations(self, feed_urls: list, user_interests: list, n_recommendations=5, deadline=None):
+        """Yield (recommendations, feeds_done) each time another feed arrives, until all did or `deadline` passes."""
+        depth = max(Config.RANKING_DEPTH, n_recommendations)
+        user_interests = self.topic_index.topics_for(user_interests)
+        key = self.result_cache.make_key(user_interests, feed_urls, depth)
+        cached = self.result_cache.peek(key)
+        if cached is not None:
+            yield cached[:n_recommendations], len(feed_urls)
+            return
+
+        if not feed_urls:
+            yield [], 0
+            return
+
+        loop = asyncio.get_running_loop()
+        expires_at = loop.time() + deadline if deadline is not None else None
+        tasks = {asyncio.ensure_future(self.get_feed_entries(url)): i for i, url in enumerate(feed_urls)}
+        arrived = {}
+        pending = set(tasks)
+        while pending:
+            timeout = max(0.0, expires_at - loop.time()) if expires_at is not None else None
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                break # deadline passed, pending fetches finish in the background
+            for task in done:
+                if task.cancelled() or task.exception() is not None:
+                    continue
+                if isinstance(task.result(), list):
+                    arrived[tasks[task]] = task.result()
+            feeds = [(feed_urls[i], arrived[i]) for i in sorted(arrived)] # keep feed order for tie-breaking
+            ranking = self.rank_feeds(feeds, user_interests, depth)
+            if not pending:
+                self.result_cache.set(key, ranking)
+            yield ranking[:n_recommendations], len(feed_urls) - len(pending)
+
+    def get_available_feeds(self, feed_urls: list):
+        """Entries that can be had without waiting, fresh or not."""
+        for url in feed_urls:
+            entries = self.article_store.get(url)
+            if entries is not None:
+                yield url, entries
+
+    async def compute_recommendations(self, feed_urls: list, user_interests: list, n_recommendations=5):
+        tasks = [self.get_feed_entries(url) for url in feed_urls]
+        with timed('feeds'):
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        feeds = [(url, entries) for url, entries in zip(feed_urls, results) if isinstance(entries, list)]
+        return self.rank_feeds(feeds, user_interests, n_recommendations)
+
+    def collect_candidates(self, feeds: list):
+        candidates = [] # (feed postings, entry index) of every valid article
+        seen_clusters = set()
+        for url, entries in feeds:
+            feed = self.topic_index.feed_postings(url, entries)
+            for i, entry in enumerate(entries):
+                if not self.is_valid_article(entry):
+                    continue
+                if feed.clusters is not None: # near-duplicates collapse to their first copy in feed order
+                    if feed.clusters[i] in seen_clusters:
+                        continue
+                    seen_clusters.add(feed.clusters[i])
+                candidates.append((feed, i))
+        return candidates
+
+    def candidate_idf(self, candidates):
+        # Prefer the ingested statistics, fall back to IDF over this corpus
+        if len(self.df_index):
+            return self.df_index.idf_values(self.scoring_engine.keywords)
+        return self.topic_index.corpus_idf(candidates)
+
+    def rank_feeds(self, feeds: list, user_interests: list, n_recommendations=5):
+        with timed('candidates'):
+            candidates = self.collect_candidates(feeds)
+        with timed('scoring'):
+            idf_values = self.candidate_idf(candidates)
+            return self.topic_index.top_k(candidates, user_interests, idf_values, n_recommendations)
+
+    def get_batch_executor(self):
+        if self.batch_executor is None and Config.BATCH_WORKERS > 0:
+            self.batch_executor = ProcessPoolExecutor(max_workers=Config.BATCH_WORKERS)
+        return self.batch_executor # None ranks in the default thread pool
+
+    async def get_batch_recommendations(self, users: dict, n_recommendations=5, chunk_size=None):
+        """
+        Rankings for many users at once: {user id: (interests, feed urls)} ->
+        {user id: top articles}, each the same as rank_feeds over that user's own feeds.
+        Every feed is read and indexed once into one candidate set. Each distinct feed
+        list numbers its own candidates in rank order (near-duplicates collapsed, other
+        feeds excluded), and each distinct (topics, feed list) pair is one row of the
+        sparse user x topic matrix, so a chunk of rows is a single product with per-row top-k.
+        """
+        import numpy as np
+
+        feed_urls = list(dict.fromkeys(url for _, urls in users.values() for url in urls))
+        results = await asyncio.gather(*(self.get_feed_entries(url) for url in feed_urls), return_exceptions=True)
+        available = {url: entries for url, entries in zip(feed_urls, results) if isinstance(entries, list)}
+
+        feed_lists = {} # feed list -> its position in group_orders
+        rows = {} # (topic columns, feed list position) -> ids of the users it ranks for
+        for user_id, (interests, urls) in users.items():
+            group = feed_lists.setdefault(tuple(urls), len(feed_lists))
+            rows.setdefault((self.topic_index.topic_columns(interests), group), []).append(user_id)
+
+        candidates = [] # every candidate of every feed list, once
+        positions = {} # (id(feed postings), entry index) -> position in candidates
+        group_orders = [] # per feed list, (candidate positions in its rank order, its IDF)
+        with timed('candidates'):
+            for urls in feed_lists:
+                order = []
+                group_candidates = self.collect_candidates([(url, available[url]) for url in urls if url in available])
+                for feed, i in group_candidates:
+                    pos = positions.setdefault((id(feed), i), len(candidates))
+                    if pos == len(candidates):
+                        candidates.append((feed, i))
+                    order.append(pos)
+                group_orders.append((order, self.candidate_idf(group_candidates)))
+
+        # -1 for candidates outside a feed list, else their place in its own ranking
+        candidate_orders = np.full((len(group_orders), len(candidates)), -1, dtype=np.int64)
+        for group, (order, _) in enumerate(group_orders):
+            candidate_orders[group, order] = np.arange(len(order))
+
+        with timed('scoring'):
+            term_frequencies = self.topic_index.term_frequencies(candidates)
+            freshness = freshness_bonus([feed.entries[i].get('published') for feed, i in candidates])
+            by_idf = {} # IDF values -> (topic scores, rows scored with them); one entry whenever the ingested IDF applies
+            for row in rows:
+                idf_values = group_orders[row[1]][1]
+                key = tuple(sorted(idf_values.items()))
+                if key not in by_idf:
+                    by_idf[key] = (self.topic_index.topic_scores(term_frequencies, idf_values), [])
+                by_idf[key][1].append(row)
+
+        chunk_size = chunk_size or Config.BATCH_CHUNK_SIZE
+        loop = asyncio.get_running_loop()
+        executor = self.get_batch_executor()
+        chunks = [] # (rows, future of their top-k positions)
+        for topic_scores, idf_rows in by_idf.values():
+            for start in range(0, len(idf_rows), chunk_size):
+                chunk = idf_rows[start:start + chunk_size]
+                user_topics = self.topic_index.interest_matrix([columns for columns, _ in chunk])
+                user_orders = np.array([group for _, group in chunk])
+                future = loop.run_in_executor(
+                    executor, rank_users, topic_scores, freshness, user_topics, candidate_orders, user_orders, n_recommendations,
+                )
+                chunks.append((chunk, future))
+
+        with timed('batch_ranking'):
+            ranked = await asyncio.gather(*(future for _, future in chunks))
+        rankings = {}
+        for (chunk, _), chunk_positions in zip(chunks, ranked):
+            for row, row_positions in zip(chunk, chunk_positions):
+                articles = [candidates[pos][0].entries[candidates[pos][1]] for pos in row_positions]
+                rankings.update((user_id, articles) for user_id in rows[row])
+        return {user_id: rankings[user_id] for user_id in users}
+
+    def warm_up(self):
+        # Rank one made-up article the way a request does: numpy, tokenization, postings and top-k.
+        # A separate index, so nothing reaches the article store or the near-duplicate index.
+        # scipy and the keyword x topic matrix stay lazy, only batch ranking needs them.
+        entry = {'title': 'Warm up', 'description': ' '.join(self.scoring_engine.keywords), 'published': datetime.now().isoformat()}
+        index = TopicKeywordIndex(self.scoring_engine)
+        candidates = [(index.feed_postings('', [entry]), 0)]
+        index.top_k(candidates, [], index.corpus_idf(candidates), 1)
+
+    async def close(self):
+        if self.batch_executor:
+            self.batch_executor.shutdown(wait=False, cancel_futures=True)
+            self.batch_executor = None
         await self.feed_parser.close()
\ No newline at end of file
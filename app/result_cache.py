@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+
+logger = logging.getLogger(__name__)
+
+class RecommendationResultCache:
+    """
+    Ranking cache keyed by interest set, feed list and result count. Callers pass
+    interests already normalized to what scoring uses; feed order is part of the key
+    because it breaks ties and picks which near-duplicate copy is kept.
+
+    Entries younger than `soft_ttl` are served as-is. Between `soft_ttl` and `hard_ttl`
+    they are still served immediately while a background task recomputes them
+    (stale-while-revalidate). Concurrent computations of the same key share one task.
+    """
+
+    def __init__(self, soft_ttl: float, hard_ttl: float, max_entries: int):
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (computed_at, value)
+        self._in_flight = {}  # key -> task
+        self.stats = {'hits': 0, 'misses': 0, 'stale': 0, 'coalesced': 0}
+
+    @staticmethod
+    def make_key(interests: List[str], feed_urls: List[str], n_recommendations: int) -> Hashable:
+        return tuple(interests), tuple(feed_urls), n_recommendations
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry is not None:
+            computed_at, value = entry
+            age = time.monotonic() - computed_at
+            if age < self.hard_ttl:
+                self._entries.move_to_end(key)
+                if age >= self.soft_ttl:
+                    self.stats['stale'] += 1
+                    self._compute(key, compute)  # revalidate in the background
+                else:
+                    self.stats['hits'] += 1
+                return value
+            del self._entries[key]
+
+        self.stats['misses'] += 1
+        # Shielded so a disconnecting client does not cancel a computation others wait on
+        return await asyncio.shield(self._compute(key, compute))
+
+    def peek(self, key: Hashable) -> Any:
+        """Fresh entry for `key` or None, without computing or touching the counters."""
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.soft_ttl:
+            return entry[1]
+        return None
+
+    def set(self, key: Hashable, value: Any):
+        self._store(key, value)
+
+    def _compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.stats['coalesced'] += 1
+            return task
+
+        async def run():
+            value = await compute()
+            self._store(key, value)
+            return value
+
+        task = asyncio.create_task(run())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda t: self._finish(key, t))
+        return task
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        self._in_flight.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Recommendation computation failed: %r", task.exception())
+
+    def _store(self, key: Hashable, value: Any):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self.stats, 'size': len(self._entries), 'in_flight': len(self._in_flight)}
+
+    def clear(self):
+        self._entries.clear()
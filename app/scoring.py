@@ -0,0 +1,102 @@
+import math
+from collections import Counter
+from datetime import datetime
+from functools import cached_property
+from typing import TYPE_CHECKING, Dict, List, Optional
+from .tokens import TokenCache, TokenizedText
+
+# numpy and scipy are imported on first use, they dominate import time
+if TYPE_CHECKING:
+    import numpy as np
+
+TOPIC_KEYWORDS = {
+    'Technology': ['tech', 'software', 'digital', 'ai', 'computer', 'app', 'cyber', 'innovation', 'programming', 'gadget', 'electronics', 'internet'],
+    'Science': ['research', 'study', 'scientist', 'discovery', 'lab', 'physics', 'chemistry', 'biology', 'astronomy', 'experiment', 'scientific'],
+    'Business': ['market', 'company', 'startup', 'finance', 'industry', 'trade', 'economy', 'investment', 'business', 'entrepreneur', 'commerce'],
+    'Arts': ['artist', 'exhibition', 'museum', 'gallery', 'painting', 'sculpture', 'art', 'design', 'creative', 'artwork', 'culture'],
+    'Politics': ['government', 'policy', 'election', 'congress', 'political', 'vote', 'democracy', 'president', 'legislation', 'campaign', 'civic'],
+    'Food': ['recipe', 'restaurant', 'cuisine', 'cooking', 'chef', 'meal', 'food', 'dining', 'ingredients', 'gourmet', 'culinary'],
+    'Fashion': ['style', 'design', 'fashion', 'trend', 'collection', 'wear', 'clothing', 'apparel', 'luxury', 'couture', 'stylish'],
+    'Movies': ['film', 'movie', 'cinema', 'director', 'actor', 'hollywood', 'screen', 'drama', 'comedy', 'thriller', 'animation'],
+    'Sports': ['game', 'player', 'team', 'tournament', 'championship', 'athlete', 'sport', 'football', 'basketball', 'soccer', 'tennis'],
+    'Health': ['medical', 'health', 'wellness', 'therapy', 'treatment', 'doctor', 'disease', 'medicine', 'healthcare', 'fitness', 'nutrition'],
+    'Music': ['song', 'album', 'artist', 'band', 'concert', 'musical', 'music', 'genre', 'melody', 'rhythm', 'lyrics'],
+    'Gaming': ['game', 'gaming', 'player', 'console', 'esports', 'developer', 'videogame', 'pc', 'playstation', 'xbox', 'nintendo'],
+    'Environment': ['climate', 'environmental', 'sustainable', 'energy', 'eco', 'nature', 'pollution', 'conservation', 'planet', 'ecology', 'green'],
+    'Travel': ['destination', 'tourism', 'travel', 'hotel', 'vacation', 'tour', 'adventure', 'explore', 'holiday', 'journey', 'trip'],
+    'Education': ['school', 'university', 'learning', 'student', 'teacher', 'course', 'education', 'knowledge', 'study', 'academic', 'college'],
+}
+
+
+def smoothed_idf(n_docs: int, df: int) -> float:
+    """IDF of a term found in `df` of `n_docs` documents, scikit-learn TfidfVectorizer's smoothed formula."""
+    return math.log((1 + n_docs) / (1 + df)) + 1
+
+def keyword_weight(idf: float) -> float:
+    """Score per unit of term frequency of a matched topic keyword: its IDF, doubled for interest relevance."""
+    return idf * 2
+
+def freshness_bonus(published_dates: List[Optional[str]], now: Optional[datetime] = None) -> 'np.ndarray':
+    """Freshness bonus for every article: 5 for <= 7 days, 3 for <= 14, 1 for <= 30, else 0."""
+    import numpy as np
+    now = now or datetime.now()
+    ages = np.full(len(published_dates), np.nan)
+    for i, published_date_str in enumerate(published_dates):
+        if not published_date_str:
+            continue
+        try:
+            published_date = datetime.fromisoformat(published_date_str.replace('Z', '+00:00'))
+            ages[i] = (now - published_date).days
+        except (ValueError, AttributeError, TypeError):
+            pass
+    # NaN ages compare False everywhere and fall through to 0
+    return np.select([ages <= 7, ages <= 14, ages <= 30], [5.0, 3.0, 1.0], default=0.0)
+
+
+class TopicScoringEngine:
+    """
+    Topic keywords and the IDF statistics they are scored with.
+
+    Topic keywords are preprocessed once at construction; the sparse keyword x topic
+    matrix, which only batch ranking uses, is built on first use. Texts are tokenized
+    through the shared token cache, so IDF counts integer token ids instead of
+    refitting a vectorizer per article.
+    """
+
+    def __init__(self, tokens: TokenCache, topic_keywords: Dict[str, List[str]] = TOPIC_KEYWORDS):
+        self.tokens = tokens
+        self.preprocess = tokens.preprocess
+        self.topics = list(topic_keywords)
+        self.topic_keywords = {
+            topic: [self.preprocess(kw) for kw in keywords] for topic, keywords in topic_keywords.items()
+        }
+
+        # Only single-token keywords can ever match a whitespace token, so the rest are dropped
+        self.keywords = sorted({
+            kw for keywords in self.topic_keywords.values() for kw in keywords if kw and ' ' not in kw
+        })
+        self.keyword_index = {kw: i for i, kw in enumerate(self.keywords)}
+        self.keyword_ids = {tokens.pin(kw): kw for kw in self.keywords}  # token id -> keyword, stable across vocabulary resets
+
+    @cached_property
+    def keyword_topic_matrix(self):
+        from scipy import sparse
+
+        # A keyword listed under several topics contributes once per topic, as before
+        membership = sparse.lil_matrix((len(self.keywords), len(self.topics)))
+        for t, topic in enumerate(self.topics):
+            for kw in self.topic_keywords[topic]:
+                if kw in self.keyword_index:
+                    membership[self.keyword_index[kw], t] += 1
+        return membership.tocsr()
+
+    def document_keywords(self, tokenized: TokenizedText) -> frozenset:
+        """Keywords among the document terms, the ones IDF counts for this text."""
+        keyword_ids = self.keyword_ids
+        return frozenset(keyword_ids[t] for t in tokenized.term_ids if t in keyword_ids)
+
+    def fit_idf(self, texts: List[str]) -> Dict[str, float]:
+        """IDF of every keyword over the corpus, TfidfVectorizer's smoothed formula."""
+        doc_freq = Counter(kw for text in texts for kw in self.document_keywords(self.tokens.get(text)))
+        n_docs = len(texts)
+        return {kw: smoothed_idf(n_docs, df) for kw, df in doc_freq.items()}
@@ -0,0 +1,165 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from .article_store import ArticleStore
+from .ingestion import FeedIngestionService
+
+logger = logging.getLogger(__name__)
+
+class SharedArticleCache:
+    """
+    Parsed feeds in a local SQLite database (WAL mode) shared by every worker process.
+
+    WAL lets all workers read while the one holding the writer lease publishes.
+    The lease is a single row that the writer renews; once it lapses, any worker
+    may take it over.
+    """
+
+    def __init__(self, path: str, lease_ttl: float = 30):
+        self.path = path
+        self.lease_ttl = lease_ttl
+        self._lock = threading.Lock()  # one connection, used from the loop and worker threads
+        self._conn = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS feeds (url TEXT PRIMARY KEY, fetched_at REAL NOT NULL, articles TEXT NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS feeds_fetched_at ON feeds (fetched_at)')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS writer_lease (id INTEGER PRIMARY KEY CHECK (id = 1), owner TEXT NOT NULL, expires_at REAL NOT NULL)'
+        )
+
+    def acquire_lease(self, owner: str) -> bool:
+        """Take or renew the writer lease. True while `owner` is the writer."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute('SELECT owner, expires_at FROM writer_lease WHERE id = 1').fetchone()
+                if row is None or row[0] == owner or row[1] < now:
+                    self._conn.execute(
+                        'INSERT OR REPLACE INTO writer_lease (id, owner, expires_at) VALUES (1, ?, ?)',
+                        (owner, now + self.lease_ttl),
+                    )
+                    acquired = True
+                else:
+                    acquired = False
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return acquired
+
+    def release_lease(self, owner: str):
+        with self._lock:
+            self._conn.execute('DELETE FROM writer_lease WHERE id = 1 AND owner = ?', (owner,))
+
+    def publish(self, url: str, entries: List[Dict], fetched_at: Optional[float] = None):
+        articles = json.dumps([dict(entry) for entry in entries], separators=(',', ':'))
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO feeds (url, fetched_at, articles) VALUES (?, ?, ?)',
+                (url, fetched_at or time.time(), articles),
+            )
+
+    def changed_since(self, since: float) -> List[Tuple[str, float, List[Dict]]]:
+        """Feeds published after `since`, oldest first, as (url, fetched_at, entries)."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT url, fetched_at, articles FROM feeds WHERE fetched_at > ? ORDER BY fetched_at', (since,)
+            ).fetchall()
+        return [(url, fetched_at, json.loads(articles)) for url, fetched_at, articles in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class SharedCacheCoordinator:
+    """
+    Keeps one worker's article store in step with the shared cache.
+
+    Every worker loads the shared cache at startup, so it serves warm results
+    before its first fetch. The worker holding the writer lease runs the
+    ingestion service and publishes each refreshed feed; the others only poll
+    the cache for feeds published since their last sync.
+    """
+
+    def __init__(
+        self,
+        cache: SharedArticleCache,
+        article_store: ArticleStore,
+        ingestion_service: Optional[FeedIngestionService] = None,
+        on_entries: Optional[Callable[[str, List[Dict]], None]] = None,
+        poll_interval: float = 10,
+    ):
+        self.cache = cache
+        self.article_store = article_store
+        self.ingestion_service = ingestion_service  # None when this deployment does not crawl
+        self.on_entries = on_entries
+        self.poll_interval = poll_interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self.is_writer = False
+        self.synced_at = 0.0
+        self._task = None
+
+    async def publish(self, url: str, entries: List[Dict]):
+        if self.is_writer:
+            await asyncio.to_thread(self.cache.publish, url, entries)  # JSON encoding and the write stay off the loop
+
+    async def sync(self) -> int:
+        """Copy feeds published by the writer since the last sync into the local store."""
+        changed = await asyncio.to_thread(self.cache.changed_since, self.synced_at)
+        for url, fetched_at, entries in changed:
+            articles = self.article_store.put(url, entries, fetched_at=fetched_at)
+            if articles and self.on_entries:
+                self.on_entries(url, articles)
+            self.synced_at = max(self.synced_at, fetched_at)
+        return len(changed)
+
+    async def _elect(self):
+        is_writer = await asyncio.to_thread(self.cache.acquire_lease, self.owner)
+        if is_writer == self.is_writer:
+            return
+        self.is_writer = is_writer
+        if self.ingestion_service is None:
+            return
+        if is_writer:
+            logger.info("Worker %s took the shared cache writer lease", self.owner)
+            self.ingestion_service.start()
+        else:
+            logger.info("Worker %s lost the shared cache writer lease", self.owner)
+            await self.ingestion_service.stop()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self._elect()
+                if not self.is_writer:
+                    await self.sync()
+            except Exception:
+                logger.exception("Shared cache sync failed")
+
+    async def start(self):
+        loaded = await self.sync()
+        logger.info("Loaded %d feeds from the shared cache", loaded)
+        await self._elect()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.ingestion_service is not None:
+            await self.ingestion_service.stop()
+        if self.is_writer:
+            await asyncio.to_thread(self.cache.release_lease, self.owner)
+            self.is_writer = False
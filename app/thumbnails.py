@@ -0,0 +1,127 @@
+import asyncio
+import hashlib
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Optional, Tuple
+
+THUMBNAIL_ID_PATTERN = re.compile(r'[0-9a-f]{64}')
+
+def thumbnail_id(source_url: str) -> str:
+    return hashlib.sha256(source_url.encode('utf-8')).hexdigest()
+
+def make_thumbnail(image_data: bytes, dest_path: str, max_size: Tuple[int, int]) -> None:
+    # Runs in a worker process: decode, resize and encode never touch the event loop
+    from PIL import Image
+
+    img = Image.open(BytesIO(image_data)).convert('RGB')
+    if img.size[0] > max_size[0] or img.size[1] > max_size[1]:
+        img.thumbnail(max_size)
+    tmp_path = f"{dest_path}.{os.getpid()}.tmp"
+    img.save(tmp_path, format="JPEG")
+    os.replace(tmp_path, dest_path)  # atomic, readers never see a partial file
+
+def prune_cache(cache_dir: str, max_bytes: int) -> int:
+    """
+    Delete the least recently used thumbnails, by modification time, until the cache
+    is under 90% of `max_bytes`, so not every store has to prune. Returns the bytes left.
+    """
+    files = []
+    with os.scandir(cache_dir) as scan:
+        for entry in scan:
+            if not entry.name.endswith('.jpg'):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:  # pruned by another worker
+                continue
+            files.append((stat.st_mtime, stat.st_size, entry.path))
+    size = sum(file_size for _, file_size, _ in files)
+    for _, file_size, path in sorted(files):
+        if size <= max_bytes * 0.9:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        size -= file_size
+    return size
+
+class ThumbnailService:
+    """
+    Content-addressed on-disk thumbnail cache keyed by the SHA-256 of the source URL.
+    Images are decoded and resized in a process pool and served by URL.
+
+    The cache is kept under `max_bytes`: a cache hit refreshes a thumbnail's
+    modification time, and once this worker's writes push the total over the budget
+    the least recently used files are deleted. Workers sharing the directory each
+    count their own writes, so it can briefly overshoot until one of them prunes.
+    """
+
+    def __init__(self, cache_dir: str, base_url: str = '', max_size: Tuple[int, int] = (300, 300), max_workers: int = 2,
+                 max_bytes: int = 512 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.base_url = base_url.rstrip('/')
+        self.max_size = max_size
+        self.max_workers = max_workers
+        self.max_bytes = max_bytes
+        self.executor = None
+        self.size = None  # bytes on disk as of the last prune plus this worker's writes, None until first scanned
+        self._pruning = False
+        self._in_flight = {}  # thumbnail id -> task, so one image is never processed twice at once
+
+    def get_executor(self):
+        if self.executor is None and self.max_workers > 0:
+            self.executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self.executor  # None falls back to the loop's default thread pool
+
+    def path_for(self, thumb_id: str) -> Optional[Path]:
+        if not THUMBNAIL_ID_PATTERN.fullmatch(thumb_id):
+            return None
+        return self.cache_dir / f"{thumb_id}.jpg"
+
+    def url_for(self, thumb_id: str) -> str:
+        return f"{self.base_url}/api/thumbnails/{thumb_id}"
+
+    def cached_url(self, source_url: str) -> Optional[str]:
+        thumb_id = thumbnail_id(source_url)
+        try:
+            os.utime(self.path_for(thumb_id))  # recently used, pruned last
+        except FileNotFoundError:
+            return None
+        return self.url_for(thumb_id)
+
+    async def store(self, source_url: str, image_data: bytes) -> str:
+        thumb_id = thumbnail_id(source_url)
+        task = self._in_flight.get(thumb_id)
+        if task is None:
+            task = asyncio.ensure_future(self._store(thumb_id, image_data))
+            self._in_flight[thumb_id] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(thumb_id, None))
+        await task
+        return self.url_for(thumb_id)
+
+    async def _store(self, thumb_id: str, image_data: bytes):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            self.get_executor(), make_thumbnail, image_data, str(self.path_for(thumb_id)), self.max_size
+        )
+        if self.size is not None:
+            try:
+                self.size += self.path_for(thumb_id).stat().st_size
+            except FileNotFoundError:
+                pass
+        if (self.size is None or self.size > self.max_bytes) and not self._pruning:
+            self._pruning = True
+            try:
+                self.size = await asyncio.to_thread(prune_cache, str(self.cache_dir), self.max_bytes)
+            finally:
+                self._pruning = False
+
+    def close(self):
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
@@ -0,0 +1,139 @@
+import hashlib
+import re
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+# Default TfidfVectorizer tokenization, the terms IDF is computed over
+_DOCUMENT_TOKEN = re.compile(r"(?u)\b\w\w+\b")
+# Space separated words that are all document terms already, the common case
+_ALL_TERMS = re.compile(r"(?:\w\w+(?: |$))*")
+
+class Vocabulary:
+    """Interned token strings, each with an integer id until the vocabulary is reset."""
+
+    def __init__(self):
+        self.ids = {}  # token -> id
+        self.tokens = []  # id -> token, None for unpinned ids below the last pinned one after a reset
+
+    def intern(self, token: str) -> int:
+        token_id = self.ids.get(token)
+        if token_id is None:
+            token_id = self.ids[token] = len(self.tokens)
+            self.tokens.append(token)
+        return token_id
+
+    def intern_all(self, tokens: List[str]) -> array:
+        for token in set(tokens).difference(self.ids):
+            self.intern(token)
+        return array('I', map(self.ids.__getitem__, tokens))
+
+    def get(self, token: str) -> Optional[int]:
+        return self.ids.get(token)
+
+    def retain(self, token_ids: Iterable[int]):
+        """
+        Forget every token but `token_ids`, which keep their ids. Every other id may be
+        handed out again for a different token, so ids from before the reset are only
+        meaningful for the retained tokens.
+        """
+        keep = set(token_ids)
+        self.tokens = [token if i in keep else None for i, token in enumerate(self.tokens[:max(keep, default=-1) + 1])]
+        self.ids = {token: i for i, token in enumerate(self.tokens) if token is not None}
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+class TokenizedText:
+    """One preprocessed text as token id arrays."""
+
+    __slots__ = ('ids', 'term_ids')
+
+    def __init__(self, ids: array, term_ids: array):
+        self.ids = ids  # lowercased words, punctuation and stopwords removed, in order
+        self.term_ids = term_ids  # document terms of the same text as IDF counts them (2+ word characters), usually `ids` itself
+
+class TokenCache:
+    """
+    Tokenizes each distinct text once. Results are kept per content hash as compact
+    uint32 arrays against a shared vocabulary, so scoring and IDF work on integers
+    and repeated texts cost one hash instead of a fresh round of string splitting.
+
+    Once the vocabulary reaches `max_vocabulary` tokens, the cache and vocabulary are
+    rebuilt from scratch. Only pinned tokens (the topic keywords) keep their ids; any
+    other id held from before the reset may now stand for a different token.
+    """
+
+    def __init__(self, stop_words: Iterable[str], punctuation: str, max_entries: int = 100000,
+                 max_vocabulary: int = 500000):
+        self.stop_words = frozenset(stop_words)
+        self.max_entries = max_entries
+        self.max_vocabulary = max_vocabulary
+        self.vocabulary = Vocabulary()
+        self._pinned = set()  # ids that survive a reset
+        self._punctuation = re.compile('[%s]' % re.escape(punctuation)) if punctuation else None
+        self._entries = OrderedDict()  # content digest -> TokenizedText
+        self._lock = threading.RLock()  # feeds are indexed from worker threads too
+        self.hits = 0
+        self.misses = 0
+        self.resets = 0
+
+    @staticmethod
+    def digest(text: str) -> bytes:
+        return hashlib.blake2b(text.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+
+    def pin(self, token: str) -> int:
+        """Id of `token`, kept across vocabulary resets."""
+        with self._lock:
+            token_id = self.vocabulary.intern(token)
+            self._pinned.add(token_id)
+            return token_id
+
+    def tokenize(self, text: str) -> TokenizedText:
+        stop_words = self.stop_words
+        text = text.lower()
+        if self._punctuation is not None:
+            text = self._punctuation.sub('', text)
+        words = [word for word in text.split() if word not in stop_words]
+        joined = ' '.join(words)
+        ids = self.vocabulary.intern_all(words)
+        if _ALL_TERMS.fullmatch(joined):
+            return TokenizedText(ids, ids)
+        return TokenizedText(ids, self.vocabulary.intern_all(_DOCUMENT_TOKEN.findall(joined)))
+
+    def get(self, text: str) -> TokenizedText:
+        key = self.digest(text)
+        with self._lock:
+            tokenized = self._entries.get(key)
+            if tokenized is not None:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return tokenized
+            self.misses += 1
+            if len(self.vocabulary) >= self.max_vocabulary:
+                self._entries.clear()  # their ids are about to be reused
+                self.vocabulary.retain(self._pinned)
+                self.resets += 1
+            tokenized = self._entries[key] = self.tokenize(text)  # interning must not race either
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return tokenized
+
+    def text(self, token_ids: Iterable[int]) -> str:
+        tokens = self.vocabulary.tokens
+        return ' '.join(tokens[token_id] for token_id in token_ids)
+
+    def preprocess(self, text: str) -> str:
+        """Lowercased text without punctuation and stopwords, as one string."""
+        with self._lock:  # ids and tokens from the same vocabulary
+            return self.text(self.get(text).ids)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits, 'misses': self.misses, 'size': len(self._entries),
+            'vocabulary': len(self.vocabulary.ids), 'resets': self.resets,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
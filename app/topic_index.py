@@ -0,0 +1,169 @@
+import heapq
+import sys
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from .article_store import ArticleStore
+from .dedup import NearDuplicateIndex
+from .scoring import TopicScoringEngine, freshness_bonus, keyword_weight, smoothed_idf
+
+def rank_users(article_topic_scores, freshness, user_topics, candidate_orders, user_orders, k: int):
+    """
+    Top-k candidate positions for each row of the sparse user x topic matrix. Scores
+    are one product, users x topics @ topics x candidates, plus the freshness bonus.
+    Row r ranks only the candidates numbered in `candidate_orders[user_orders[r]]`
+    (-1 elsewhere), ties broken by that number, so it matches top_k over that row's
+    own candidate list. Module level so chunks of users can be ranked in a process pool.
+    """
+    import numpy as np
+
+    scores = user_topics @ article_topic_scores.T + freshness
+    orders = candidate_orders[user_orders]
+    excluded = orders < 0
+    scores[excluded] = -np.inf
+    ranked = np.lexsort((orders, -scores), axis=1)[:, :k]
+    counts = np.minimum((~excluded).sum(axis=1), k)
+    return [row[:count].tolist() for row, count in zip(ranked, counts)]
+
+class FeedKeywordPostings:
+    """Keyword postings for one parsed feed, built once per entries list."""
+
+    __slots__ = ('entries', 'postings', 'doc_keywords', 'clusters')
+
+    def __init__(self, entries: List[Dict], postings: Dict[str, List[Tuple[int, float]]], doc_keywords: List[frozenset],
+                 clusters: Optional[List[str]] = None):
+        self.entries = entries
+        self.postings = postings  # keyword -> [(entry index, term frequency)]
+        self.doc_keywords = doc_keywords  # keywords each entry contains, as IDF counts them
+        self.clusters = clusters  # near-duplicate cluster of each entry, None without deduplication
+
+    def estimated_size(self) -> int:
+        # Entries belong to the article store, keyword strings and cluster ids are shared
+        size = sys.getsizeof(self) + sys.getsizeof(self.postings) + sys.getsizeof(self.doc_keywords)
+        for postings in self.postings.values():
+            size += sys.getsizeof(postings) + len(postings) * (sys.getsizeof((0, 0.0)) + sys.getsizeof(0.0))
+        size += sum(map(sys.getsizeof, self.doc_keywords))
+        if self.clusters is not None:
+            size += sys.getsizeof(self.clusters)
+        return size
+
+class TopicKeywordIndex:
+    """
+    Inverted index from topic keywords to the articles that contain them.
+
+    Postings are built once per fetched feed, so a request only walks the postings
+    of the keywords in the user's interests and selects the top k with a bounded heap.
+    They are kept in the article store next to the feed's articles, within its memory
+    budget, and go when the store evicts or replaces them; entries the store does not
+    hold are indexed per call.
+    """
+
+    def __init__(self, scoring_engine: TopicScoringEngine, store: Optional[ArticleStore] = None,
+                 duplicates: Optional[NearDuplicateIndex] = None):
+        self.engine = scoring_engine
+        self.store = store
+        self.duplicates = duplicates
+
+    def feed_postings(self, url: str, entries: List[Dict]) -> FeedKeywordPostings:
+        if self.store is not None:
+            feed = self.store.postings(url, entries)
+            if feed is not None:
+                return feed
+
+        keyword_ids = self.engine.keyword_ids
+        postings = {}
+        doc_keywords = []
+        clusters = [] if self.duplicates is not None else None
+        for i, entry in enumerate(entries):
+            text = f"{entry.get('title', '')} {entry.get('description', '')}"
+            if clusters is not None:
+                clusters.append(self.duplicates.add(entry.get('link') or text, text))
+            tokenized = self.engine.tokens.get(text)
+            n_tokens = len(tokenized.ids)
+            for token_id, count in Counter(t for t in tokenized.ids if t in keyword_ids).items():
+                postings.setdefault(keyword_ids[token_id], []).append((i, count / n_tokens))
+            doc_keywords.append(self.engine.document_keywords(tokenized))
+
+        feed = FeedKeywordPostings(entries, postings, doc_keywords, clusters)
+        if self.store is not None:
+            self.store.set_postings(url, entries, feed, feed.estimated_size())
+        return feed
+
+    def corpus_idf(self, candidates: List[Tuple[FeedKeywordPostings, int]]) -> Dict[str, float]:
+        """Keyword IDF over the candidates alone, same values as fitting TfidfVectorizer on them."""
+        doc_freq = Counter(keyword for feed, i in candidates for keyword in feed.doc_keywords[i])
+        n_docs = len(candidates)
+        return {keyword: smoothed_idf(n_docs, df) for keyword, df in doc_freq.items()}
+
+    def keyword_weights(self, interests: List[str], idf_values: Dict[str, float]) -> Dict[str, float]:
+        topics = [topic for topic in self.engine.topics if topic in set(interests)] or self.engine.topics
+        weights = {}
+        for topic in topics:
+            for keyword in self.engine.topic_keywords[topic]:
+                if keyword in idf_values:
+                    weights[keyword] = weights.get(keyword, 0.0) + keyword_weight(idf_values[keyword])
+        return weights
+
+    def topic_columns(self, interests: List[str]) -> Tuple[int, ...]:
+        """Positions of the user's topics, all topics when none match, like keyword_weights."""
+        topics = set(interests)
+        return tuple(t for t, topic in enumerate(self.engine.topics) if topic in topics) or tuple(range(len(self.engine.topics)))
+
+    def topics_for(self, interests: List[str]) -> List[str]:
+        """The topics scoring uses for these interests, in a canonical order: equal lists rank alike."""
+        return [self.engine.topics[t] for t in self.topic_columns(interests)]
+
+    def interest_matrix(self, topic_columns: List[Tuple[int, ...]]):
+        """Sparse user x topic matrix, each row ones at one user's topic_columns."""
+        import numpy as np
+        from scipy import sparse
+
+        indptr, indices = [0], []
+        for columns in topic_columns:
+            indices.extend(columns)
+            indptr.append(len(indices))
+        data = np.ones(len(indices))
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(topic_columns), len(self.engine.topics)))
+
+    def term_frequencies(self, candidates: List[Tuple[FeedKeywordPostings, int]]):
+        """Sparse candidate x keyword term frequencies, the part of topic_scores that does not depend on IDF."""
+        from scipy import sparse
+
+        positions = {(id(feed), i): pos for pos, (feed, i) in enumerate(candidates)}
+        feeds = {id(feed): feed for feed, _ in candidates}
+        keyword_index = self.engine.keyword_index
+        rows, columns, tfs = [], [], []
+        for feed_id, feed in feeds.items():
+            for keyword, postings in feed.postings.items():
+                for i, tf in postings:
+                    pos = positions.get((feed_id, i))
+                    if pos is not None:
+                        rows.append(pos)
+                        columns.append(keyword_index[keyword])
+                        tfs.append(tf)
+        return sparse.csr_matrix((tfs, (rows, columns)), shape=(len(candidates), len(self.engine.keywords)))
+
+    def topic_scores(self, term_frequencies, idf_values: Dict[str, float]):
+        """Candidate x topic scores: what top_k adds to a candidate for a user following only that topic."""
+        import numpy as np
+        from scipy import sparse
+
+        keyword_weights = np.array([keyword_weight(idf_values.get(kw, 0.0)) for kw in self.engine.keywords])
+        weighted_membership = sparse.diags(keyword_weights) @ self.engine.keyword_topic_matrix
+        return np.asarray((term_frequencies @ weighted_membership).todense())
+
+    def top_k(self, candidates: List[Tuple[FeedKeywordPostings, int]], interests: List[str], idf_values: Dict[str, float], k: int) -> List[Dict]:
+        positions = {(id(feed), i): pos for pos, (feed, i) in enumerate(candidates)}
+        scores = freshness_bonus([feed.entries[i].get('published') for feed, i in candidates]).tolist()
+
+        weights = self.keyword_weights(interests, idf_values)
+        feeds = {id(feed): feed for feed, _ in candidates}
+        for feed_id, feed in feeds.items():
+            for keyword, weight in weights.items():
+                for i, tf in feed.postings.get(keyword, ()):
+                    pos = positions.get((feed_id, i))
+                    if pos is not None:
+                        scores[pos] += tf * weight
+
+        # nlargest is stable, ties keep corpus order
+        top = heapq.nlargest(k, range(len(candidates)), key=scores.__getitem__)
+        return [candidates[pos][0].entries[candidates[pos][1]] for pos in top]
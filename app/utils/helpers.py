@@ -1,3 +1,9 @@
 def validate_request_data(data, required_fields):
     """Validate that all required fields are present in the request data"""
-    return all(field in data for field in required_fields)
\ No newline at end of file
+    return all(field in data for field in required_fields)
+
+def load_stopwords(language: str = 'english') -> frozenset:
+    """Stopword list bundled with the package (the NLTK corpus), no download needed"""
+    from importlib import resources
+    text = resources.files('app').joinpath('resources', f'stopwords_{language}.txt').read_text(encoding='utf-8')
+    return frozenset(text.split())
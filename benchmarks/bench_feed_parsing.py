@@ -0,0 +1,104 @@
+"""
+Feeds parsed per second: the original inline feedparser + BeautifulSoup path
+against the parsing stage in app.parsing, inline and through a worker pool.
+
+    python -m benchmarks.bench_feed_parsing --feeds 40 --entries 50
+"""
+import argparse
+import asyncio
+import random
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from email.utils import format_datetime
+import feedparser
+from bs4 import BeautifulSoup
+from app.parsing import parse_feed_content
+
+WORDS = "market election climate film recipe player research software museum travel school health album console fashion".split()
+
+def make_feed(n_entries: int, seed: int) -> str:
+    rng = random.Random(seed)
+    items = []
+    for i in range(n_entries):
+        body = ' '.join(rng.choices(WORDS, k=120))
+        description = (
+            f'<div class="lead"><img src="https://img.example.com/{seed}/{i}.jpg" width="600"/>'
+            f'<p>{body}</p><p><a href="https://example.com/{i}">Read more &amp; share</a></p></div>'
+        )
+        items.append(
+            f"<item><title>{' '.join(rng.choices(WORDS, k=8))}</title>"
+            f"<link>https://example.com/{seed}/{i}</link>"
+            f"<description><![CDATA[{description}]]></description>"
+            f"<pubDate>{format_datetime(datetime(2024, 1, 1))}</pubDate>"
+            f"<category>{rng.choice(WORDS)}</category></item>"
+        )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>bench</title>{"".join(items)}</channel></rss>'
+
+def _baseline_clean_html(html_content: str) -> str:
+    text = BeautifulSoup(html_content, 'html.parser').get_text()
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text[:200] + '...' if len(text) > 200 else text
+
+def baseline_parse(feed_content: str, max_entries: int = 20):
+    # The pre-refactor FeedParser.parse_feed body, minus networking
+    feed = feedparser.parse(feed_content)
+    all_entries = feed.entries
+    random.shuffle(all_entries)
+    entries = []
+    for entry in all_entries[:max_entries]:
+        thumbnail = None
+        if hasattr(entry, 'media_thumbnail'):
+            thumbnail = entry.media_thumbnail[0]['url']
+        elif hasattr(entry, 'media_content'):
+            thumbnail = entry.media_content[0]['url']
+        else:
+            content = entry.get('description', '') or entry.get('summary', '')
+            img = BeautifulSoup(content, 'html.parser').find('img')
+            if img and img.get('src'):
+                thumbnail = img['src']
+        entries.append({
+            'title': entry.get('title', ''),
+            'description': _baseline_clean_html(entry.get('description', '') or entry.get('summary', '')),
+            'thumbnail': thumbnail,
+        })
+    return entries
+
+def time_inline(fn, feeds) -> float:
+    start = time.perf_counter()
+    for feed in feeds:
+        fn(feed)
+    return len(feeds) / (time.perf_counter() - start)
+
+def time_pool(executor, feeds) -> float:
+    async def run():
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(executor, parse_feed_content, feed) for feed in feeds))
+    asyncio.run(run())  # warm the pool up
+    start = time.perf_counter()
+    asyncio.run(run())
+    return len(feeds) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--feeds', type=int, default=40)
+    parser.add_argument('--entries', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    feeds = [make_feed(args.entries, seed) for seed in range(args.feeds)]
+    results = {
+        'baseline (feedparser + bs4, inline)': time_inline(baseline_parse, feeds),
+        'parse_feed_content, inline': time_inline(parse_feed_content, feeds),
+    }
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        results[f'parse_feed_content, {args.workers} threads'] = time_pool(executor, feeds)
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        results[f'parse_feed_content, {args.workers} processes'] = time_pool(executor, feeds)
+
+    for name, feeds_per_second in results.items():
+        print(f"{name:<45} {feeds_per_second:8.1f} feeds/s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Cold-start cost of a worker: import time of app.app, lifespan startup and the
+time until the first /api/recommendations request succeeds, each measured in
+a fresh interpreter against the local stub feed server. Runs once without and
+once with the WARMUP_ON_STARTUP hook.
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+import time
+
+PROCESS_START = time.perf_counter()
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+def child(args):
+    # Config is read when the app module is imported, so it is set up first
+    from app.config import Config
+    Config.FEED_INGESTION_ENABLED = False
+    Config.WARMUP_ON_STARTUP = args.warm_up
+    Config.THUMBNAIL_CACHE_DIR = os.path.join(args.tmpdir, 'thumbnails')
+    Config.DF_INDEX_PATH = os.path.join(args.tmpdir, 'df_index.json')
+    Config.SHARED_CACHE_PATH = os.path.join(args.tmpdir, 'shared_articles.db')
+
+    import_start = time.perf_counter()
+    import app.app as app_module
+    import_done = time.perf_counter()
+
+    import httpx
+    from app.auth_cache import FirebaseAuthLayer
+    from benchmarks.fake_firebase import FakeAuth, FakeFirestore
+
+    firestore = FakeFirestore()
+    app_module.auth_layer = FirebaseAuthLayer(FakeAuth(), firestore)
+    topic = next(iter(app_module.feed_manager.feed_sources))
+    app_module.feed_manager.feed_sources = {topic: [f"{args.base_url}/feeds/{n}.rss" for n in range(args.feeds)]}
+    firestore.add_user('startup', [topic])
+
+    async def first_request():
+        async with app_module.app.router.lifespan_context(app_module.app):
+            lifespan_done = time.perf_counter()
+            transport = httpx.ASGITransport(app=app_module.app)
+            async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=120) as client:
+                response = await client.get('/api/recommendations', headers={'Authorization': 'Bearer startup'})
+            first_response = time.perf_counter()
+        return lifespan_done, first_response, response.status_code, len(response.json().get('recommendations', []))
+
+    lifespan_done, first_response, status, n_results = asyncio.run(first_request())
+    print(json.dumps({
+        'interpreter_to_import_s': import_start - PROCESS_START,
+        'import_s': import_done - import_start,
+        'lifespan_s': lifespan_done - import_done,
+        'first_request_s': first_response - lifespan_done,
+        'time_to_first_response_s': first_response - PROCESS_START,
+        'status': status,
+        'recommendations': n_results,
+    }))
+
+def run_child(args, warm_up: bool, tmpdir: str) -> dict:
+    command = [
+        sys.executable, '-m', 'benchmarks.bench_startup', '--child',
+        '--base-url', args.base_url, '--feeds', str(args.feeds), '--tmpdir', tmpdir,
+    ]
+    if warm_up:
+        command.append('--warm-up')
+    start = time.perf_counter()
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['process_wall_s'] = time.perf_counter() - start
+    return result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--feeds', type=int, default=5, help='feeds the first request ranks')
+    parser.add_argument('--port', type=int, default=8799)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--warm-up', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    parser.add_argument('--tmpdir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    from benchmarks.stub_server import StubFeedServer, StubServerThread
+
+    with StubServerThread(StubFeedServer(port=args.port)) as server:
+        args.base_url = server.base_url
+        for warm_up in (False, True):
+            runs = []
+            for _ in range(args.runs):
+                with tempfile.TemporaryDirectory() as tmpdir:  # every run starts without caches
+                    runs.append(run_child(args, warm_up, tmpdir))
+            failed = sum(run['status'] != 200 for run in runs)
+            print(f"WARMUP_ON_STARTUP={warm_up} ({args.runs} runs, {failed} failed), median:")
+            for metric in ('import_s', 'lifespan_s', 'first_request_s', 'time_to_first_response_s', 'process_wall_s'):
+                print(f"  {metric:<28}{statistics.median(run[metric] for run in runs) * 1000:10.1f} ms")
+
+if __name__ == '__main__':
+    main()
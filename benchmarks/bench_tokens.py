@@ -0,0 +1,123 @@
+"""
+Tokenization and keyword scoring over a large synthetic corpus: the previous
+per-character `preprocess_text` with string split/count scoring against the
+content-hash TokenCache, cold (every text new) and warm (every text seen, as
+when a feed is re-fetched or ranked for another user), and the request path
+built on it: keyword postings per feed, then corpus IDF and top-k.
+
+    python -m benchmarks.bench_tokens --articles 100000
+"""
+import argparse
+import random
+import statistics
+import string
+import sys
+import time
+from datetime import datetime, timedelta
+
+from app.scoring import TOPIC_KEYWORDS, TopicScoringEngine, freshness_bonus
+from app.tokens import TokenCache
+from app.topic_index import TopicKeywordIndex
+from app.utils.helpers import load_stopwords
+
+FILLER = "the a of to in and for on with as by at from new report says after over about more than its their".split()
+
+def synthetic_corpus(n_articles: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    keywords = [kw for keywords in TOPIC_KEYWORDS.values() for kw in keywords]
+    vocabulary = [f"w{n}" for n in range(20000)]
+    corpus = []
+    for _ in range(n_articles):
+        words = [rng.choice(FILLER) if rng.random() < 0.4 else
+                 rng.choice(keywords).capitalize() if rng.random() < 0.1 else
+                 rng.choice(vocabulary) for _ in range(rng.randint(20, 60))]
+        corpus.append(' '.join(words[:8]) + ': ' + ' '.join(words[8:]) + '.')
+    return corpus
+
+def legacy_preprocess(text, punctuation, stop_words):
+    text = text.lower()
+    text = ''.join([char for char in text if char not in punctuation])
+    tokens = text.split()
+    tokens = [token for token in tokens if token not in stop_words]
+    return " ".join(tokens)
+
+def legacy_score(processed_text, keywords):
+    tokens = processed_text.split()
+    return sum(tokens.count(kw) / len(tokens) for kw in keywords if kw in processed_text) if tokens else 0
+
+def timed(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--articles', type=int, default=100000)
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--feed-size', type=int, default=50, help='articles per feed for the postings path')
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.articles)
+    stop_words = load_stopwords('english')
+    punctuation = string.punctuation
+    keywords = sorted({kw for keywords in TOPIC_KEYWORDS.values() for kw in keywords})
+    print(f"{len(corpus)} articles, {sum(map(len, corpus)) / 1e6:.1f} MB of text")
+
+    def legacy():
+        for text in corpus:
+            legacy_score(legacy_preprocess(text, punctuation, stop_words), keywords)
+
+    def fresh_engine():
+        return TopicScoringEngine(TokenCache(stop_words, punctuation, max_entries=len(corpus)))
+
+    def cold():
+        tokens = fresh_engine().tokens
+        for text in corpus:
+            tokens.get(text)
+
+    published = (datetime.now() - timedelta(days=3)).isoformat()
+    feeds = [
+        (f"feed-{start}", [{'title': text, 'description': '', 'published': published} for text in corpus[start:start + args.feed_size]])
+        for start in range(0, len(corpus), args.feed_size)
+    ]
+
+    freshness_bonus([])  # the numpy import is not what is measured
+    engine = fresh_engine()
+    feed_texts = [f"{entry['title']} {entry['description']}" for _, entries in feeds for entry in entries]  # as feed_postings joins them
+    for text in feed_texts:  # fills the token cache for the warm runs
+        engine.tokens.get(text)
+
+    def postings():
+        index = TopicKeywordIndex(engine)  # no store, every feed is indexed
+        return [(feed, i) for url, entries in feeds for feed in [index.feed_postings(url, entries)] for i in range(len(entries))]
+
+    candidates = postings()  # every article of every feed
+    index = TopicKeywordIndex(engine)
+
+    def rank():
+        index.top_k(candidates, ['Technology', 'Science'], index.corpus_idf(candidates), 50)
+
+    results = {
+        'legacy preprocess': timed(lambda: [legacy_preprocess(text, punctuation, stop_words) for text in corpus], args.runs),
+        'legacy preprocess + score': timed(legacy, args.runs),
+        'TokenCache tokenize (cold)': timed(cold, args.runs),
+        'TokenCache lookup (warm)': timed(lambda: [engine.tokens.get(text) for text in feed_texts], args.runs),
+        'feed_postings (warm tokens)': timed(postings, args.runs),
+        'corpus_idf + top_k': timed(rank, args.runs),
+    }
+    for name, seconds in results.items():
+        print(f"  {name:<32}{seconds * 1000:10.1f} ms")
+
+    tokens = engine.tokens
+    arrays = {id(a): a for t in tokens._entries.values() for a in (t.ids, t.term_ids)}  # term_ids is usually ids itself
+    id_bytes = sum(map(sys.getsizeof, arrays.values()))
+    string_bytes = sum(sys.getsizeof(legacy_preprocess(text, punctuation, stop_words)) for text in corpus)
+    print(f"  token id arrays {id_bytes / 1e6:.1f} MB vs preprocessed strings {string_bytes / 1e6:.1f} MB, "
+          f"vocabulary {len(tokens.vocabulary)} tokens")
+    print(f"  cache {tokens.stats()}")
+
+if __name__ == '__main__':
+    main()
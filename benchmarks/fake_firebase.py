@@ -0,0 +1,57 @@
+"""
+In-memory stand-ins for firebase_admin's `auth` module and Firestore client.
+A token is the uid itself, so `Authorization: Bearer <uid>` authenticates as <uid>.
+"""
+import time
+from typing import Dict, List, Optional
+
+class FakeAuth:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def verify_id_token(self, token: str) -> Dict:
+        self.calls += 1
+        time.sleep(self.latency)
+        if not token:
+            raise ValueError("Empty token")
+        return {'uid': token, 'exp': time.time() + 3600}
+
+class FakeSnapshot:
+    def __init__(self, data: Optional[Dict]):
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self) -> Optional[Dict]:
+        return dict(self._data) if self._data is not None else None
+
+class FakeDocument:
+    def __init__(self, store: 'FakeFirestore', collection: str, doc_id: str):
+        self.store = store
+        self.collection = collection
+        self.doc_id = doc_id
+
+    def get(self) -> FakeSnapshot:
+        self.store.calls += 1
+        time.sleep(self.store.latency)
+        return FakeSnapshot(self.store.data.get(self.collection, {}).get(self.doc_id))
+
+class FakeCollection:
+    def __init__(self, store: 'FakeFirestore', name: str):
+        self.store = store
+        self.name = name
+
+    def document(self, doc_id: str) -> FakeDocument:
+        return FakeDocument(self.store, self.name, doc_id)
+
+class FakeFirestore:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self.data = {}  # collection -> doc id -> dict
+
+    def collection(self, name: str) -> FakeCollection:
+        return FakeCollection(self, name)
+
+    def add_user(self, uid: str, interests: List[str]):
+        self.data.setdefault('users', {})[uid] = {'interests': list(interests)}
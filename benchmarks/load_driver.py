@@ -0,0 +1,83 @@
+"""
+Drives /api/recommendations in-process through httpx's ASGI transport and
+records per-request latency, grouped by how many interests the user has.
+"""
+import asyncio
+import random
+import sys
+import time
+from typing import Dict, List
+import httpx
+import numpy as np
+
+def peak_rss_mb() -> float:
+    try:
+        import resource
+    except ImportError:  # Windows
+        return float('nan')
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024  # bytes on macOS, KiB elsewhere
+
+def summarize(latencies: List[float], elapsed: float) -> Dict:
+    if not latencies:
+        return {'requests': 0}
+    ms = np.array(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'mean_ms': float(ms.mean()),
+        'throughput_rps': len(latencies) / elapsed if elapsed else 0.0,
+    }
+
+def make_users(firestore, topics: List[str], interest_counts: List[int], users_per_count: int, seed: int = 0) -> Dict[int, List[str]]:
+    rng = random.Random(seed)
+    users = {}
+    for count in interest_counts:
+        users[count] = []
+        for i in range(users_per_count):
+            uid = f"bench-{count}-{i}"
+            firestore.add_user(uid, rng.sample(topics, count))
+            users[count].append(uid)
+    return users
+
+async def drive(app, users: Dict[int, List[str]], requests_per_count: int, concurrency: int, n_recommendations: int = 5) -> Dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = {count: [] for count in users}
+    errors = {count: 0 for count in users}
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=120) as client:
+        async def one(count: int, uid: str):
+            async with semaphore:
+                start = time.perf_counter()
+                response = await client.get(
+                    '/api/recommendations',
+                    params={'n_recommendations': n_recommendations},
+                    headers={'Authorization': f'Bearer {uid}'},
+                )
+                elapsed = time.perf_counter() - start
+            if response.status_code == 200:
+                latencies[count].append(elapsed)
+            else:
+                errors[count] += 1
+
+        jobs = [
+            one(count, uids[i % len(uids)])
+            for count, uids in users.items()
+            for i in range(requests_per_count)
+        ]
+        random.Random(1).shuffle(jobs)
+        start = time.perf_counter()
+        await asyncio.gather(*jobs)
+        total_elapsed = time.perf_counter() - start
+
+    all_latencies = [latency for values in latencies.values() for latency in values]
+    return {
+        'overall': {**summarize(all_latencies, total_elapsed), 'errors': sum(errors.values())},
+        'by_interest_count': {
+            str(count): {**summarize(latencies[count], total_elapsed), 'errors': errors[count]} for count in users
+        },
+        'peak_rss_mb': peak_rss_mb(),
+    }
@@ -0,0 +1,180 @@
+"""
+End-to-end benchmark: a local stub feed server, fake Firebase, a load driver
+against /api/recommendations and separate stage timings. Results are written
+as JSON; pass --compare with an earlier result file to print the deltas.
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --output after.json --compare bench.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List
+from app.config import Config
+from benchmarks.fake_firebase import FakeAuth, FakeFirestore
+from benchmarks.load_driver import drive, make_users, peak_rss_mb, summarize
+from benchmarks.stub_server import StubFeedServer, StubServerThread
+
+def configure(tmpdir: str, args) -> None:
+    # Config is read when the app module is imported, so this must run first
+    Config.FEED_INGESTION_ENABLED = args.ingestion
+    Config.FEED_STARTUP_SPREAD = 0
+    Config.THUMBNAIL_CACHE_DIR = os.path.join(tmpdir, 'thumbnails')
+    Config.DF_INDEX_PATH = os.path.join(tmpdir, 'df_index.json')
+    Config.SHARED_CACHE_PATH = os.path.join(tmpdir, 'shared_articles.db')
+    if args.no_result_cache:
+        Config.RESULT_CACHE_SOFT_TTL = 0
+        Config.RESULT_CACHE_HARD_TTL = 0
+
+def point_feeds_at_stub(app_module, server: StubFeedServer, feeds_per_topic: int) -> List[str]:
+    topics = list(app_module.feed_manager.feed_sources)
+    app_module.feed_manager.feed_sources = {
+        topic: [server.feed_url(t * feeds_per_topic + j, 'atom' if j % 2 else 'rss') for j in range(feeds_per_topic)]
+        for t, topic in enumerate(topics)
+    }
+    app_module.ingestion_service.feed_urls = app_module.feed_manager.get_all_feeds()
+    return topics
+
+async def time_calls(fn, args_list) -> Dict:
+    latencies = []
+    start = time.perf_counter()
+    for args in args_list:
+        call_start = time.perf_counter()
+        result = fn(*args)
+        if asyncio.iscoroutine(result):
+            await result
+        latencies.append(time.perf_counter() - call_start)
+    return summarize(latencies, time.perf_counter() - start)
+
+async def stage_timings(server: StubFeedServer, args) -> Dict:
+    from app.feed_parser import FeedParser
+    from app.parsing import parse_feed_content
+    from app.recommender import TopicBasedRecommender
+
+    timings = {}
+    parser = FeedParser()
+    try:
+        # Feed numbers past the ones the load test uses, so nothing is cached yet
+        feed_numbers = range(10000, 10000 + args.stage_samples)
+        timings['parse_feed'] = await time_calls(
+            parser.parse_feed, [(server.feed_url(n),) for n in feed_numbers]
+        )
+        timings['fetch_image'] = await time_calls(
+            parser.fetch_image, [(f"{server.base_url}/images/stage-{i}.jpg",) for i in range(args.stage_samples)]
+        )
+    finally:
+        await parser.close()
+
+    recommender = TopicBasedRecommender()
+    feeds = [(server.feed_url(n), parse_feed_content(server.render_rss(n), max_entries=10 ** 6)) for n in range(args.corpus_feeds)]
+    entries = [entry for _, feed_entries in feeds for entry in feed_entries]
+    corpus = [f"{entry['title']} {entry['description']}" for entry in entries]
+    timings['calculate_topic_score'] = await time_calls(
+        recommender.calculate_topic_score,
+        [(corpus[i], [], entries[i]['published'], corpus) for i in range(min(args.stage_samples, len(corpus)))],
+    )
+    timings['calculate_topic_score']['corpus_size'] = len(corpus)
+    timings['rank_corpus'] = await time_calls(
+        recommender.rank_feeds,
+        [(feeds, [], Config.RANKING_DEPTH)] * args.stage_samples,
+    )
+    await recommender.close()
+    return timings
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+async def run(args) -> Dict:
+    with tempfile.TemporaryDirectory() as tmpdir, StubServerThread(StubFeedServer(
+        port=args.port,
+        entries_per_feed=args.entries,
+        image_size=args.image_size,
+        feed_latency=args.feed_latency,
+        image_latency=args.image_latency,
+        duplicate_rate=args.duplicate_rate,
+    )) as server:
+        configure(tmpdir, args)
+        import app.app as app_module
+        from app.auth_cache import FirebaseAuthLayer
+
+        firestore = FakeFirestore(latency=args.firestore_latency)
+        app_module.auth_layer = FirebaseAuthLayer(FakeAuth(latency=args.auth_latency), firestore)
+        topics = point_feeds_at_stub(app_module, server, args.feeds_per_topic)
+        users = make_users(firestore, topics, args.interest_counts, args.users_per_count)
+
+        async with app_module.app.router.lifespan_context(app_module.app):
+            if args.ingestion:
+                await app_module.ingestion_service.refresh()
+            load = await drive(app_module.app, users, args.requests, args.concurrency)
+            stages = await stage_timings(server, args)
+
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'git_revision': git_revision(),
+            'parameters': {k: v for k, v in vars(args).items() if k not in ('output', 'compare')},
+            'load': load,
+            'stages': stages,
+            'stub_requests': dict(server.requests),
+            'peak_rss_mb': peak_rss_mb(),
+        }
+
+def compare(current: Dict, baseline: Dict):
+    def rows(result):
+        yield 'load.overall', result['load']['overall']
+        for name, stats in result['stages'].items():
+            yield f'stages.{name}', stats
+
+    baseline_rows = dict(rows(baseline))
+    print(f"{'metric':<36}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, stats in rows(current):
+        for metric in ('p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps'):
+            before = baseline_rows.get(name, {}).get(metric)
+            after = stats.get(metric)
+            if before is None or after is None:
+                continue
+            change = (after - before) / before * 100 if before else float('nan')
+            print(f"{name + '.' + metric:<36}{before:>12.2f}{after:>12.2f}{change:>+9.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', help='earlier result file to diff against')
+    parser.add_argument('--port', type=int, default=8799)
+    parser.add_argument('--feeds-per-topic', type=int, default=5)
+    parser.add_argument('--entries', type=int, default=30, help='entries per stub feed')
+    parser.add_argument('--image-size', type=int, default=800, help='stub image width/height in pixels')
+    parser.add_argument('--feed-latency', type=float, default=0.05, help='seconds')
+    parser.add_argument('--image-latency', type=float, default=0.02, help='seconds')
+    parser.add_argument('--duplicate-rate', type=float, default=0.0, help='share of entries carried by every feed (wire stories)')
+    parser.add_argument('--auth-latency', type=float, default=0.01, help='seconds per fake token verification')
+    parser.add_argument('--firestore-latency', type=float, default=0.02, help='seconds per fake Firestore read')
+    parser.add_argument('--interest-counts', type=int, nargs='+', default=[1, 3, 5])
+    parser.add_argument('--users-per-count', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=50, help='requests per interest count')
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--stage-samples', type=int, default=10)
+    parser.add_argument('--corpus-feeds', type=int, default=10, help='feeds in the calculate_topic_score corpus')
+    parser.add_argument('--ingestion', action='store_true', help='warm the article store before the load test')
+    parser.add_argument('--no-result-cache', action='store_true', help='recompute every ranking')
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    print(json.dumps(result['load']['overall'], indent=2))
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare(result, json.load(f))
+
+if __name__ == '__main__':
+    main()
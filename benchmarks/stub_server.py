@@ -0,0 +1,137 @@
+"""
+Local aiohttp server serving synthetic RSS/Atom feeds and JPEG images, with
+configurable size and latency, so benchmarks never touch the network.
+
+    /feeds/{n}.rss     RSS 2.0 feed number n
+    /feeds/{n}.atom    Atom feed number n
+    /images/{key}.jpg  JPEG image (same bytes for every key)
+"""
+import asyncio
+import random
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from io import BytesIO
+from aiohttp import web
+from PIL import Image
+from app.scoring import TOPIC_KEYWORDS
+
+FILLER = "the a report said today new people year week after first more time also would over".split()
+KEYWORDS = [kw for keywords in TOPIC_KEYWORDS.values() for kw in keywords]
+
+class StubFeedServer:
+    def __init__(self, host: str = '127.0.0.1', port: int = 8799, entries_per_feed: int = 30,
+                 image_size: int = 800, feed_latency: float = 0.0, image_latency: float = 0.0, seed: int = 0,
+                 duplicate_rate: float = 0.0):
+        self.host = host
+        self.port = port
+        self.entries_per_feed = entries_per_feed
+        self.image_size = image_size
+        self.feed_latency = feed_latency
+        self.image_latency = image_latency
+        self.seed = seed
+        self.duplicate_rate = duplicate_rate  # share of entries that copy a wire story other feeds carry too
+        self.requests = {'feeds': 0, 'images': 0}
+        self._image = None
+        self._runner = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def feed_url(self, n: int, kind: str = 'rss') -> str:
+        return f"{self.base_url}/feeds/{n}.{kind}"
+
+    def _story(self, rng: random.Random):
+        # Filler plus words of its own, so unrelated stories are not near-duplicates
+        words = rng.choices(FILLER, k=40) + [f"w{rng.randrange(10 ** 6)}" for _ in range(20)]
+        words += rng.choices(KEYWORDS, k=rng.randint(0, 8))
+        rng.shuffle(words)
+        return ' '.join(rng.choices(FILLER + KEYWORDS, k=8)).capitalize(), ' '.join(words)
+
+    def _entries(self, n: int):
+        rng = random.Random(self.seed * 100003 + n)
+        now = datetime.now(timezone.utc)
+        for i in range(self.entries_per_feed):
+            if rng.random() < self.duplicate_rate:
+                title, text = self._story(random.Random(f"wire-{self.seed}-{i}"))  # entry i of every feed
+            else:
+                title, text = self._story(rng)
+            yield {
+                'title': title,
+                'link': f"https://stub.example/{n}/{i}",
+                'description': f'<p><img src="{self.base_url}/images/{n}-{i}.jpg"/>{text}</p>',
+                'published': now - timedelta(days=rng.uniform(0, 40)),
+            }
+
+    def render_rss(self, n: int) -> str:
+        items = ''.join(
+            f"<item><title>{e['title']}</title><link>{e['link']}</link>"
+            f"<description><![CDATA[{e['description']}]]></description>"
+            f"<pubDate>{format_datetime(e['published'])}</pubDate></item>"
+            for e in self._entries(n)
+        )
+        return f'<?xml version="1.0"?><rss version="2.0"><channel><title>Stub {n}</title>{items}</channel></rss>'
+
+    def render_atom(self, n: int) -> str:
+        items = ''.join(
+            f"<entry><title>{e['title']}</title><link href=\"{e['link']}\"/><id>{e['link']}</id>"
+            f"<summary type=\"html\"><![CDATA[{e['description']}]]></summary>"
+            f"<updated>{e['published'].isoformat()}</updated></entry>"
+            for e in self._entries(n)
+        )
+        return f'<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom"><title>Stub {n}</title>{items}</feed>'
+
+    def image_bytes(self) -> bytes:
+        if self._image is None:
+            rng = random.Random(self.seed)
+            # Noise, so the JPEG is realistically large and expensive to decode
+            img = Image.frombytes('RGB', (self.image_size, self.image_size), rng.randbytes(3 * self.image_size ** 2))
+            buffered = BytesIO()
+            img.save(buffered, format='JPEG')
+            self._image = buffered.getvalue()
+        return self._image
+
+    async def handle_feed(self, request: web.Request) -> web.Response:
+        self.requests['feeds'] += 1
+        await asyncio.sleep(self.feed_latency)
+        n, kind = request.match_info['n'], request.match_info['kind']
+        if kind == 'atom':
+            return web.Response(text=self.render_atom(int(n)), content_type='application/atom+xml')
+        return web.Response(text=self.render_rss(int(n)), content_type='application/rss+xml')
+
+    async def handle_image(self, request: web.Request) -> web.Response:
+        self.requests['images'] += 1
+        await asyncio.sleep(self.image_latency)
+        return web.Response(body=self.image_bytes(), content_type='image/jpeg')
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/feeds/{n:\\d+}.{kind:rss|atom}', self.handle_feed)
+        app.router.add_get('/images/{key}.jpg', self.handle_image)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+class StubServerThread:
+    """Runs a StubFeedServer on its own event loop thread, away from the app under test."""
+
+    def __init__(self, server: StubFeedServer):
+        self.server = server
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    def __enter__(self) -> StubFeedServer:
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.server.start(), self.loop).result()
+        return self.server
+
+    def __exit__(self, *exc_info):
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
@@ -0,0 +1,24 @@
+from datetime import datetime, timedelta
+
+from app.article_store import ArticleStore
+from app.recommender import TopicBasedRecommender
+
+def feed_entries(url, n=20):
+    published = (datetime.now() - timedelta(days=2)).isoformat()
+    return [{'title': f"software research {i}", 'description': f"tech study number {i} of {url}", 'link': f"{url}#{i}",
+             'published': published, 'thumbnail': 'https://stub.example/thumb.jpg'} for i in range(n)]
+
+def test_postings_are_budgeted_and_evicted_with_their_feed():
+    recommender = TopicBasedRecommender()
+    recommender.topic_index.duplicates = None  # the feeds are near-copies of each other, not what is tested
+    store = recommender.article_store = recommender.topic_index.store = ArticleStore(50 * 1024, 600, 3600)
+    for n in range(300):
+        url = f"https://stub.example/{n}.rss"
+        store.put(url, feed_entries(url))
+        recommender.rank_feeds([(url, store.get(url))], ['Technology'], 5)
+
+    held = [record.postings for record in store._feeds.values() if record.postings is not None]
+    assert 0 < len(held) <= len(store) < 300
+    assert store.size == sum(record.size for record in store._feeds.values()) <= store.max_bytes
+    url = next(iter(store._feeds))
+    assert recommender.topic_index.feed_postings(url, store.get(url)) is store._feeds[url].postings
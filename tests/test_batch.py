@@ -0,0 +1,59 @@
+"""Batch rankings must equal ranking each user's own feeds on their own."""
+import asyncio
+import random
+
+import pytest
+from datetime import datetime, timedelta
+
+from app.recommender import TopicBasedRecommender
+from app.scoring import TOPIC_KEYWORDS
+
+TOPICS = ['Technology', 'Science', 'Gaming', 'Food']
+FILLER = "the new report says after over about more than plain words here".split()
+
+def topic_feeds(per_topic=2, per_feed=15, seed=3):
+    rng = random.Random(seed)
+    feeds = {}
+    for topic in TOPICS:
+        for f in range(per_topic):
+            url = f"https://stub.example/{topic}/{f}.rss"
+            feeds[url] = [{
+                'title': ' '.join(rng.choices(TOPIC_KEYWORDS[topic] + FILLER, k=4)),
+                'description': ' '.join(rng.choices(TOPIC_KEYWORDS[topic] + FILLER, k=rng.randint(5, 25))),
+                'link': f"{url}#{i}",
+                # Fresher articles in later feeds, so freshness alone would pull them up
+                'published': (datetime.now() - timedelta(days=rng.choice([1, 10, 20]), hours=12)).isoformat(),
+                'thumbnail': 'https://stub.example/thumb.jpg',
+            } for i in range(per_feed)]
+    return feeds
+
+def feeds_for(interests, feeds):
+    return [url for topic in interests for url in feeds if f"/{topic}/" in url]
+
+@pytest.mark.parametrize('ingested', [False, True]) # IDF per feed list, or one IDF from the df index
+def test_batch_matches_per_user_rankings(ingested):
+    recommender = TopicBasedRecommender()
+    feeds = topic_feeds()
+    for url, entries in feeds.items():
+        stored = recommender.article_store.put(url, entries)
+        if ingested:
+            recommender.index_articles(url, stored)
+    interest_sets = [['Gaming'], ['Technology', 'Science'], ['Food', 'Gaming'], ['Science'], ['Nope'], []]
+    users = {f"user{n}": (interests, feeds_for(interests, feeds)) for n, interests in enumerate(interest_sets * 3)}
+    # Same topics over the same feeds in another order, and feeds that do not follow the interests
+    users['reversed'] = (['Technology', 'Science'], feeds_for(['Technology', 'Science'], feeds)[::-1])
+    users['mismatched'] = (['Gaming'], feeds_for(['Food'], feeds))
+
+    rankings = asyncio.run(recommender.get_batch_recommendations(users, n_recommendations=5, chunk_size=4))
+
+    assert list(rankings) == list(users)
+    for user_id, (interests, urls) in users.items():
+        expected = recommender.rank_feeds([(url, recommender.article_store.get(url)) for url in urls], interests, 5)
+        assert [article['link'] for article in rankings[user_id]] == [article['link'] for article in expected], user_id
+    assert all(article['link'].startswith('https://stub.example/Gaming/') for article in rankings['user0'])
+    assert rankings['user4'] == rankings['user5'] == [] # no feeds
+
+def test_batch_without_any_articles():
+    recommender = TopicBasedRecommender()
+    users = {'a': (['Gaming'], []), 'b': (['Food'], [])}
+    assert asyncio.run(recommender.get_batch_recommendations(users)) == {'a': [], 'b': []}
@@ -0,0 +1,35 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app.df_index import DocumentFrequencyIndex
+
+def test_concurrent_snapshots_of_one_path(tmp_path):
+    path = str(tmp_path / 'df_index.json')
+    index = DocumentFrequencyIndex()
+    for n in range(200):
+        index.add(f"doc{n}", [f"term{n % 7}", 'shared'], datetime.now())
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: index.snapshot(path), range(32)))
+
+    assert DocumentFrequencyIndex.load(path).doc_freq == index.doc_freq
+    assert [p.name for p in tmp_path.iterdir()] == ['df_index.json']  # no temp files left behind
+
+def test_only_topic_keywords_are_indexed(tmp_path):
+    from app.recommender import TopicBasedRecommender
+
+    recommender = TopicBasedRecommender()
+    published = datetime.now().isoformat()
+    entries = [{'title': f"Software startup {n}", 'description': f"quarterly widget report {n}", 'link': f"l{n}",
+                'published': published, 'thumbnail': 't'} for n in range(3)]
+    entries.append({**entries[0], 'title': 'Nothing', 'description': 'relevant at all', 'link': 'plain'})
+    recommender.index_articles('feed', entries)
+
+    assert len(recommender.df_index) == 4  # keyword-free articles still count towards IDF
+    assert recommender.df_index.doc_freq == {'software': 3, 'startup': 3}
+
+    path = str(tmp_path / 'df_index.json')
+    old = DocumentFrequencyIndex()  # a snapshot from before, with every document term
+    old.add('old', ['software', 'widget', 'quarterly'], datetime.now())
+    old.snapshot(path)
+    assert DocumentFrequencyIndex.load(path, terms=recommender.scoring_engine.keywords).doc_freq == {'software': 1}
@@ -0,0 +1,67 @@
+import asyncio
+
+from aiohttp import web
+
+from app.feed_parser import FeedParser
+
+async def serve(handler):
+    app = web.Application()
+    app.router.add_get('/feed.rss', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/feed.rss"
+
+def test_stalled_body_counts_as_failure():
+    async def stall(request):
+        response = web.StreamResponse(status=200)
+        await response.prepare(request)
+        await response.write(b'<rss><channel>')
+        await asyncio.sleep(1)
+        return response
+
+    async def run():
+        runner, url = await serve(stall)
+        parser = FeedParser()
+        parser.health.max_timeout = 0.2
+        try:
+            for _ in range(parser.health.failure_threshold):
+                assert await parser.parse_feed(url, force_refresh=True) == []
+        finally:
+            await parser.close()
+            await runner.cleanup()
+        return parser.health, url
+
+    registry, url = asyncio.run(run())
+    health = registry.get(url)
+    assert health.failures == health.consecutive_failures == registry.failure_threshold
+    assert health.last_status == 200
+    assert not registry.allow_request(url)
+
+def test_empty_refresh_keeps_previous_entries():
+    from benchmarks.stub_server import StubFeedServer
+
+    # Thumbnails point at a closed port and fail fast
+    feeds = [StubFeedServer(port=1).render_rss(0), '<rss version="2.0"><channel><title>Empty</title></channel></rss>']
+    etags = iter(['"full"', '"empty"'])
+
+    async def feed(request):
+        return web.Response(text=feeds.pop(0), content_type='application/rss+xml', headers={'ETag': next(etags)})
+
+    async def run():
+        runner, url = await serve(feed)
+        parser = FeedParser()
+        try:
+            first = await parser.parse_feed(url)
+            second = await parser.parse_feed(url, force_refresh=True)
+        finally:
+            await parser.close()
+            await runner.cleanup()
+        return parser, url, first, second
+
+    parser, url, first, second = asyncio.run(run())
+    assert first and second is first
+    assert parser.feed_cache.get(url) is first
+    assert parser.feed_validators.get(url)['etag'] == '"full"'
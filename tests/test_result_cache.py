@@ -0,0 +1,47 @@
+import asyncio
+
+from app.recommender import TopicBasedRecommender
+from app.result_cache import RecommendationResultCache
+
+def age(cache, key, seconds):
+    computed_at, value = cache._entries[key]
+    cache._entries[key] = (computed_at - seconds, value)
+
+def test_keys_follow_what_scoring_uses():
+    recommender = TopicBasedRecommender()
+    key = lambda interests, feeds: recommender.result_cache.make_key(recommender.topic_index.topics_for(interests), feeds, 50)
+
+    assert key(['Science', 'Technology', 'Nope'], ['a', 'b']) == key(['Technology', 'Science'], ['a', 'b'])
+    assert key(['Nope'], ['a']) == key([], ['a'])  # both score with every topic
+    assert key([' Technology'], ['a']) != key(['Technology'], ['a'])  # unstripped interests match no topic
+    assert key(['Technology'], ['a', 'b']) != key(['Technology'], ['b', 'a'])  # feed order breaks ties
+
+def test_stale_while_revalidate_single_flight_and_hard_ttl():
+    cache = RecommendationResultCache(soft_ttl=60, hard_ttl=600, max_entries=10)
+    calls = []
+
+    async def compute():
+        calls.append(None)
+        await asyncio.sleep(0.01)
+        return f"ranking {len(calls)}"
+
+    async def run():
+        # Concurrent misses share one computation
+        first = await asyncio.gather(*(cache.get_or_compute('k', compute) for _ in range(5)))
+        assert first == ['ranking 1'] * 5 and len(calls) == 1
+        assert await cache.get_or_compute('k', compute) == 'ranking 1'
+
+        # Past the soft TTL: the old ranking at once, one background refresh for every stale reader
+        age(cache, 'k', 61)
+        stale = await asyncio.gather(*(cache.get_or_compute('k', compute) for _ in range(3)))
+        assert stale == ['ranking 1'] * 3 and len(calls) == 2
+        await asyncio.sleep(0.05)
+        assert await cache.get_or_compute('k', compute) == 'ranking 2'
+
+        # Past the hard TTL: callers wait for a new ranking
+        age(cache, 'k', 601)
+        assert await cache.get_or_compute('k', compute) == 'ranking 3'
+
+    asyncio.run(run())
+    assert len(calls) == 3
+    assert cache.get_stats() == {'hits': 2, 'misses': 6, 'stale': 3, 'coalesced': 6, 'size': 1, 'in_flight': 0}
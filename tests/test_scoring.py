@@ -0,0 +1,124 @@
+"""
+Scores and rankings must match the original per-article TF-IDF implementation,
+kept below as a reference copy: one TfidfVectorizer fit per article, substring
+keyword matching and the 5/3/1 freshness bonus.
+"""
+import asyncio
+import random
+import string
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import Config
+from app.recommender import TopicBasedRecommender
+from app.scoring import TOPIC_KEYWORDS
+from app.utils.helpers import load_stopwords
+
+TfidfVectorizer = pytest.importorskip('sklearn.feature_extraction.text').TfidfVectorizer
+
+STOP_WORDS = set(load_stopwords('english'))
+
+def reference_preprocess(text):
+    text = text.lower()
+    text = ''.join([char for char in text if char not in string.punctuation])
+    return " ".join(token for token in text.split() if token not in STOP_WORDS)
+
+def reference_tfidf_score(article_text, interest_keywords, idf_values):
+    article_text = reference_preprocess(article_text)
+    score = 0
+    for keywords in interest_keywords.values():
+        for keyword in keywords:
+            keyword = reference_preprocess(keyword)
+            if keyword in article_text:
+                tf = article_text.split().count(keyword) / len(article_text.split()) if article_text.split() else 0
+                score += tf * idf_values.get(keyword, 0) * 2
+    return score
+
+def reference_topic_score(text, published_date_str, corpus_texts, topics=TOPIC_KEYWORDS):
+    vectorizer = TfidfVectorizer()
+    vectorizer.fit([reference_preprocess(doc) for doc in corpus_texts])
+    idf_values = dict(zip(vectorizer.get_feature_names_out(), vectorizer.idf_))
+    topic_keywords = {topic: [reference_preprocess(kw) for kw in TOPIC_KEYWORDS[topic]] for topic in topics}
+    score = reference_tfidf_score(text, topic_keywords, idf_values)
+    if published_date_str:
+        try:
+            published_date = datetime.fromisoformat(published_date_str.replace('Z', '+00:00'))
+            age_days = (datetime.now() - published_date).days
+            score += 5 if age_days <= 7 else 3 if age_days <= 14 else 1 if age_days <= 30 else 0
+        except (ValueError, AttributeError, TypeError):
+            pass
+    return score
+
+def reference_ranking(recommender, feeds, n, topics=TOPIC_KEYWORDS):
+    """The original ranking, scored with the keywords of `topics` only (the original used every topic)."""
+    articles = [entry for _, entries in feeds for entry in entries if recommender.is_valid_article(entry)]
+    corpus = [f"{entry['title']} {entry['description']}" for entry in articles]
+    scored = [(entry, reference_topic_score(text, entry['published'], corpus, topics)) for entry, text in zip(articles, corpus)]
+    scored.sort(key=lambda pair: pair[1], reverse=True)
+    return [entry for entry, _ in scored[:n]]
+
+def synthetic_feeds(n_feeds=4, per_feed=30, seed=1):
+    rng = random.Random(seed)
+    words = [kw for keywords in TOPIC_KEYWORDS.values() for kw in keywords]
+    words += "the said market's new a of ai-driven AI, Tech! games players plain words café — e-sports".split()
+    feeds = []
+    for f in range(n_feeds):
+        entries = []
+        for i in range(per_feed):
+            # Mid-day ages keep the freshness bands from shifting while the test runs
+            published = datetime.now() - timedelta(days=rng.choice([0, 3, 8, 13, 20, 29, 35]), hours=12)
+            entries.append({
+                'title': ' '.join(rng.choices(words, k=rng.randint(1, 6))),
+                'description': ' '.join(rng.choices(words, k=rng.randint(1, 30))),
+                'link': f"https://stub.example/{f}/{i}",
+                'published': published.isoformat() + ('Z' if i % 10 == 0 else ''),
+                'thumbnail': 'https://stub.example/thumb.jpg',
+            })
+        feeds.append((f"https://stub.example/{f}.rss", entries))
+    return feeds
+
+@pytest.fixture
+def recommender():
+    recommender = TopicBasedRecommender()
+    recommender.topic_index.duplicates = None  # the reference never collapsed near-duplicates
+    return recommender
+
+def test_calculate_topic_score_matches_reference(recommender):
+    entries = [entry for _, entries in synthetic_feeds() for entry in entries]
+    corpus = [f"{entry['title']} {entry['description']}" for entry in entries]
+    for i in range(0, len(corpus), 7):
+        expected = reference_topic_score(corpus[i], entries[i]['published'], corpus)
+        actual = recommender.calculate_topic_score(corpus[i], [], entries[i]['published'], corpus)
+        assert actual == pytest.approx(expected, abs=1e-9)
+
+def test_rank_feeds_matches_reference_without_matching_interests(recommender):
+    feeds = synthetic_feeds()
+    n = sum(len(entries) for _, entries in feeds)
+    expected = reference_ranking(recommender, feeds, n)
+    actual = recommender.rank_feeds(feeds, ['No such topic'], n)
+    assert [entry['link'] for entry in actual] == [entry['link'] for entry in expected]
+
+def test_rank_feeds_scores_only_the_users_topics(recommender):
+    feeds = synthetic_feeds()
+    n = sum(len(entries) for _, entries in feeds)
+    for interests in (['Gaming'], ['Sports', 'Gaming'], ['Technology', 'Nope', 'Food']):
+        expected = reference_ranking(recommender, feeds, n, [topic for topic in TOPIC_KEYWORDS if topic in interests])
+        actual = recommender.rank_feeds(feeds, interests, n)
+        assert [entry['link'] for entry in actual] == [entry['link'] for entry in expected], interests
+
+def test_pages_are_slices_of_one_ranking(recommender):
+    feeds = synthetic_feeds()
+    for url, entries in feeds:
+        recommender.article_store.put(url, entries)
+    feed_urls = [url for url, _ in feeds]
+    offsets = range(0, Config.RANKING_DEPTH - 6, 7)  # pages within the cached depth
+    expected = [entry['link'] for entry in reference_ranking(recommender, feeds, Config.RANKING_DEPTH, ['Science', 'Health'])]
+
+    async def pages():
+        return [await recommender.get_recommendations('reader', feed_urls, ['Health', 'Science'], n_recommendations=7, offset=offset)
+                for offset in offsets]
+
+    pages = asyncio.run(pages())
+    assert [[article['link'] for article in page] for page in pages] == [expected[offset:offset + 7] for offset in offsets]
+    assert recommender.result_cache.stats['misses'] == 1  # every page after the first is a slice of the cached ranking
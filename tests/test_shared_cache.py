@@ -0,0 +1,44 @@
+import asyncio
+
+from app.article_store import ArticleStore
+from app.recommender import TopicBasedRecommender
+from app.shared_cache import SharedArticleCache, SharedCacheCoordinator
+
+ENTRY = {'title': 't', 'description': 'd', 'link': 'l', 'published': '2026-10-01', 'thumbnail': 'x', 'author': 'A', 'categories': []}
+
+def test_reader_syncs_what_the_writer_publishes(tmp_path):
+    path = str(tmp_path / 'shared.db')
+
+    async def run():
+        writer = SharedCacheCoordinator(SharedArticleCache(path), ArticleStore(10 ** 7, 60, 600), poll_interval=60)
+        reader = SharedCacheCoordinator(SharedArticleCache(path), ArticleStore(10 ** 7, 60, 600), poll_interval=60)
+        writer.owner, reader.owner = 'writer', 'reader'
+        await writer.start()
+        await reader.start()
+        try:
+            await reader.publish('u1', [ENTRY])  # not the writer, ignored
+            await writer.publish('u2', [ENTRY])
+            assert await reader.sync() == 1
+        finally:
+            await reader.stop()
+            await writer.stop()
+        return writer, reader
+
+    writer, reader = asyncio.run(run())
+    assert writer.is_writer is False and 'u1' not in reader.article_store
+    assert [dict(article) for article in reader.article_store.get('u2')] == [ENTRY]
+
+def test_stale_managed_feeds_are_not_refetched_on_request():
+    recommender = TopicBasedRecommender()
+    recommender.article_store.fresh_ttl = 0  # everything is stale at once
+    recommender.article_store.put('managed', [ENTRY])
+    recommender.article_store.put('other', [ENTRY])
+    recommender.managed_feeds = frozenset({'managed'})
+    refreshed = []
+    recommender.refresh_feed = refreshed.append
+
+    async def run():
+        return [await recommender.get_feed_entries(url) for url in ('managed', 'other')]
+
+    assert all(entries for entries in asyncio.run(run()))
+    assert refreshed == ['other']
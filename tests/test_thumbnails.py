@@ -0,0 +1,55 @@
+import asyncio
+import os
+from io import BytesIO
+
+import pytest
+from aiohttp import web
+
+from app.feed_parser import FeedParser
+from app.thumbnails import ThumbnailService, thumbnail_id
+
+Image = pytest.importorskip('PIL.Image')
+
+def jpeg(seed: int) -> bytes:
+    buffer = BytesIO()
+    Image.effect_noise((200, 200), 50 + seed).convert('RGB').save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+def test_cache_stays_under_budget_and_keeps_recent_thumbnails(tmp_path):
+    service = ThumbnailService(str(tmp_path), max_workers=0, max_bytes=200 * 1024)
+
+    async def run():
+        for n in range(40):
+            await service.store(f"https://img.example/{n}.jpg", jpeg(n))
+            assert service.cached_url("https://img.example/0.jpg")  # used all along
+
+    asyncio.run(run())
+    files = list(tmp_path.glob('*.jpg'))
+    assert sum(f.stat().st_size for f in files) <= service.max_bytes
+    assert (tmp_path / f"{thumbnail_id('https://img.example/0.jpg')}.jpg") in files
+    assert (tmp_path / f"{thumbnail_id('https://img.example/39.jpg')}.jpg") in files
+    assert service.cached_url("https://img.example/1.jpg") is None
+
+def test_oversized_images_are_not_downloaded(tmp_path):
+    async def image(request):
+        return web.Response(body=os.urandom(64 * 1024), content_type='image/jpeg')
+
+    async def run():
+        app = web.Application()
+        app.router.add_get('/big.jpg', image)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        parser = FeedParser()
+        parser.thumbnails = ThumbnailService(str(tmp_path), max_workers=0)
+        parser.max_image_bytes = 16 * 1024
+        try:
+            return await parser.fetch_image(f"http://127.0.0.1:{port}/big.jpg")
+        finally:
+            await parser.close()
+            await runner.cleanup()
+
+    assert asyncio.run(run()) is None
+    assert not list(tmp_path.iterdir())
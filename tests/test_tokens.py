@@ -0,0 +1,20 @@
+import string
+
+from app.scoring import TopicScoringEngine
+from app.tokens import TokenCache
+from app.utils.helpers import load_stopwords
+
+def test_vocabulary_is_bounded_and_keeps_keyword_ids():
+    tokens = TokenCache(load_stopwords('english'), string.punctuation, max_vocabulary=1000)
+    engine = TopicScoringEngine(tokens)
+    keyword_ids = dict(engine.keyword_ids)
+
+    for n in range(500):
+        tokens.get(f"Unique{n}a unique{n}b, unique{n}c! The software")
+
+    assert tokens.resets > 0
+    assert len(tokens.vocabulary) <= 1000 + 4
+    assert {tokens.vocabulary.get(kw): kw for kw in keyword_ids.values()} == keyword_ids
+    assert tokens.preprocess("The new Software, for gaming!") == 'new software gaming'
+    tokenized = tokens.get("software gaming software")
+    assert sorted(engine.document_keywords(tokenized)) == ['gaming', 'software']